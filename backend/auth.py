@@ -1,10 +1,13 @@
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional, Union
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
 from sqlmodel import select
 from .database import get_session
 from .models import User
@@ -19,6 +22,13 @@ load_dotenv()
 SECRET_KEY = os.getenv("AUTH_SECRET_KEY", "fallback-secret-key-for-dev-only")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
+# Authenticated users are cached this long (seconds) to skip the per-request SELECT; 0 disables.
+# Only read requests use the cache: invalidate() reaches just the worker that made the
+# change, so with several API workers a deleted account can keep reading for up to this long
+AUTH_USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", "60"))
+# Methods that may be served a cached user; writes always re-check the row exists
+AUTH_CACHED_METHODS = ("GET", "HEAD", "OPTIONS")
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login", auto_error=False)
@@ -39,7 +49,97 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)):
+class AuthCache:
+    """
+    Two small LRUs in front of get_current_user: verified tokens -> (expiry,
+    subject), so a known token skips signature checks, and subject ->
+    (cached at, User column values), so a known user skips the SELECT.
+    Users are stored as plain values and rebuilt per request, never shared
+    between sessions.
+    """
+
+    def __init__(self, ttl: float = AUTH_USER_CACHE_TTL, size: int = AUTH_CACHE_SIZE):
+        self.ttl = ttl
+        self.size = size
+        self._lock = threading.Lock()
+        self._tokens = OrderedDict()
+        self._users = OrderedDict()
+
+    def _put(self, store, key, value):
+        store[key] = value
+        store.move_to_end(key)
+        while len(store) > self.size:
+            store.popitem(last=False)
+
+    def subject(self, token: str):
+        with self._lock:
+            entry = self._tokens.get(token)
+            if entry is None:
+                return None
+            expires, subject = entry
+            if expires <= time.time():
+                del self._tokens[token]
+                return None
+            self._tokens.move_to_end(token)
+            return subject
+
+    def remember_token(self, token: str, payload: dict):
+        if self.size > 0 and payload.get("exp"):
+            with self._lock:
+                self._put(self._tokens, token, (float(payload["exp"]), payload["sub"]))
+
+    def user(self, subject: str):
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._users.get(subject)
+            if entry is None:
+                return None
+            cached_at, values = entry
+            if time.monotonic() - cached_at > self.ttl:
+                del self._users[subject]
+                return None
+            return values
+
+    def remember_user(self, subject: str, user: User):
+        if self.ttl > 0 and self.size > 0:
+            values = {c.name: getattr(user, c.name) for c in User.__table__.columns}
+            with self._lock:
+                self._put(self._users, subject, (time.monotonic(), values))
+
+    def invalidate(self, subject: str):
+        # Call after changing or deleting a user so no request sees the old row
+        with self._lock:
+            self._users.pop(subject, None)
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+            self._users.clear()
+
+
+auth_cache = AuthCache()
+
+def _decode_subject(token: str):
+    subject = auth_cache.subject(token)
+    if subject is None:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        subject = payload.get("sub")
+        if subject is not None:
+            auth_cache.remember_token(token, payload)
+    return subject
+
+def _attach_cached_user(values: dict, session: Session) -> User:
+    # Rebuild the row as a persistent object of this request's session
+    # without querying, so endpoints can still modify or delete it
+    user = User(**values)
+    make_transient_to_detached(user)
+    session.add(user)
+    return user
+
+def get_current_user(request: Request, token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)):
+    # Plain def: FastAPI runs it in its threadpool, so a cache miss's MySQL
+    # query never blocks the event loop of the async endpoints that use it
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -48,14 +148,21 @@ async def get_current_user(token: str = Depends(oauth2_scheme), session: Session
     if not token:
         raise credentials_exception
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
+        email: str = _decode_subject(token)
         if email is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
     
+    # Writes skip the cached user: another worker may have deleted the account,
+    # and its rows would then fail the user_id foreign key instead of a clean 401
+    if request.method in AUTH_CACHED_METHODS:
+        cached = auth_cache.user(email)
+        if cached is not None:
+            return _attach_cached_user(cached, session)
+
     user = session.exec(select(User).where(User.email == email)).first()
     if user is None:
         raise credentials_exception
+    auth_cache.remember_user(email, user)
     return user
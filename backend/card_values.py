@@ -0,0 +1,145 @@
+import json
+import os
+import re
+
+from sqlalchemy import delete, event, insert, inspect
+from sqlalchemy.orm import Session
+
+from .models import BusinessCard, CardValue
+
+# Country code assumed for numbers printed without one (e.g. "98765 43210")
+PHONE_DEFAULT_COUNTRY_CODE = os.getenv("PHONE_DEFAULT_COUNTRY_CODE", "91")
+
+# BusinessCard JSON list column -> CardValue.kind
+LIST_COLUMNS = {
+    "phones": "phone",
+    "emails": "email",
+    "addresses": "address",
+    "websites": "website",
+    "tags": "tag",
+}
+
+# ---------------------------
+# Normalization
+# ---------------------------
+def normalize_email(value: str) -> str:
+    return (value or "").strip().lower()
+
+def normalize_phone(value: str, country_code: str = PHONE_DEFAULT_COUNTRY_CODE) -> str:
+    # Best-effort E.164: "+91 98765-43210", "098765 43210" and "9876543210" all
+    # become "+919876543210"
+    raw = (value or "").strip()
+    digits = re.sub(r"\D", "", raw)
+    if not digits:
+        return ""
+    if raw.startswith("+"):
+        return "+" + digits
+    if digits.startswith("00"):
+        return "+" + digits[2:]
+    if len(digits) == 11 and digits.startswith("0"):
+        digits = digits[1:]
+    if len(digits) == 10:
+        return "+" + country_code + digits
+    return "+" + digits
+
+def normalize_website(value: str) -> str:
+    value = re.sub(r"^https?://", "", (value or "").strip().lower()).rstrip("/")
+    return value[4:] if value.startswith("www.") else value
+
+def normalize_text(value: str) -> str:
+    return re.sub(r"\s+", " ", (value or "").strip()).lower()
+
+COMPANY_SUFFIXES = re.compile(r"\b(pvt|private|ltd|limited|llp|llc|inc|corp|corporation|co|company|gmbh)\b")
+
+def fingerprint(name: str, company: str) -> str:
+    # "Jane  Doe" + "ACME Pvt. Ltd." -> "jane doe|acme"; empty unless both are known
+    name = " ".join(re.findall(r"\w+", (name or "").lower()))
+    company = " ".join(re.findall(r"\w+", COMPANY_SUFFIXES.sub(" ", (company or "").lower())))
+    return f"{name}|{company}" if name and company else ""
+
+NORMALIZERS = {
+    "phone": normalize_phone,
+    "email": normalize_email,
+    "address": normalize_text,
+    "website": normalize_website,
+    "tag": normalize_text,
+    "fingerprint": lambda value: value,
+}
+
+def normalize(kind: str, value: str) -> str:
+    # Truncated to fit the indexed column
+    return NORMALIZERS[kind](value)[:255]
+
+# ---------------------------
+# Sync
+# ---------------------------
+def _load_list(raw):
+    try:
+        items = json.loads(raw or "[]")
+    except (TypeError, ValueError):
+        return []
+    return [str(i) for i in items if i] if isinstance(items, list) else []
+
+def list_value_rows(column: str, raw, seen=None):
+    # (kind, value, value_norm) for the entries of one JSON list column
+    kind = LIST_COLUMNS[column]
+    seen = set() if seen is None else seen
+    rows = []
+    for value in _load_list(raw):
+        norm = normalize(kind, value)
+        if norm and (kind, norm) not in seen:
+            seen.add((kind, norm))
+            rows.append((kind, value[:512], norm))
+    return rows
+
+def card_value_rows(card: BusinessCard, columns=LIST_COLUMNS):
+    # (kind, value, value_norm) for every list entry of the card, without
+    # duplicates, plus its name+company fingerprint for duplicate detection
+    rows = []
+    seen = set()
+    fp = fingerprint(getattr(card, "name", None), getattr(card, "company", None))
+    if fp:
+        rows.append(("fingerprint", fp, fp[:255]))
+    for column in columns:
+        rows += list_value_rows(column, getattr(card, column), seen)
+    return rows
+
+def sync_card_values(card: BusinessCard):
+    rows = card_value_rows(card)
+    card.values = [
+        CardValue(user_id=card.user_id, kind=kind, value=value, value_norm=norm)
+        for kind, value, norm in rows
+    ]
+
+def replace_list_values(session, column: str, cards):
+    # For set-based UPDATEs, which skip the flush hook below: rewrites one
+    # column's CardValue rows from [(card_id, user_id, raw JSON list)]
+    if not cards:
+        return
+    kind = LIST_COLUMNS[column]
+    session.exec(delete(CardValue).where(
+        CardValue.card_id.in_([card_id for card_id, _, _ in cards]),
+        CardValue.kind == kind
+    ))
+    rows = [
+        {"card_id": card_id, "user_id": user_id, "kind": kind, "value": value, "value_norm": norm}
+        for card_id, user_id, raw in cards
+        for _, value, norm in list_value_rows(column, raw)
+    ]
+    if rows:
+        session.exec(insert(CardValue), params=rows)
+
+@event.listens_for(Session, "before_flush")
+def _sync_on_flush(session, flush_context, instances):
+    # Any insert of a card, or an update touching a list column, name/company
+    # (the fingerprint) or its owner, rewrites its CardValue rows (deletes
+    # cascade through the relationship)
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, BusinessCard):
+            continue
+        if obj in session.new:
+            sync_card_values(obj)
+            continue
+        state = inspect(obj)
+        if any(state.attrs[c].history.has_changes() for c in list(LIST_COLUMNS) + ["name", "company", "user_id"]):
+            sync_card_values(obj)
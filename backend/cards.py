@@ -0,0 +1,58 @@
+import json
+from typing import Optional
+
+from .models import BusinessCard
+
+
+def auto_tags(result: dict, event_name: Optional[str] = None):
+    # Auto-Tagging Logic
+    tags = []
+    designation = (result.get("designation") or "").lower()
+    company = (result.get("company") or "").lower()
+
+    if any(x in designation for x in ["engineer", "developer", "architect", "cto", "tech"]):
+        tags.append("Tech")
+    if any(x in designation for x in ["ceo", "founder", "director", "president", "vp", "chief"]):
+        tags.append("Executive")
+    if any(x in designation for x in ["sales", "account", "business development", "rep"]):
+        tags.append("Sales")
+    if any(x in designation for x in ["marketing", "brand", "cmo"]):
+        tags.append("Marketing")
+    if any(x in designation for x in ["product", "manager"]):
+        tags.append("Product")
+    if any(x in designation for x in ["designer", "creative", "art", "ui", "ux"]):
+        tags.append("Design")
+    if "investor" in designation or "capital" in company:
+        tags.append("Investor")
+
+    if event_name:
+        tags.append(event_name)
+    return tags
+
+
+def card_from_scan(
+    result: dict,
+    user_id: int,
+    event_name: Optional[str] = None,
+    location_lat: Optional[float] = None,
+    location_lng: Optional[float] = None,
+    location_name: Optional[str] = None,
+) -> BusinessCard:
+    # Create a BusinessCard (not yet saved) from OCR output
+    return BusinessCard(
+        name=result.get("name", "Unknown"),
+        designation=result.get("designation"),
+        company=result.get("company"),
+        phones=json.dumps(result.get("phones", [])),
+        emails=json.dumps(result.get("emails", [])),
+        addresses=json.dumps(result.get("addresses", [])),
+        websites=json.dumps(result.get("websites", [])),
+        ocr_avg_confidence=result.get("ocr_avg_confidence", 0.0),
+        user_id=user_id,
+        # New Features
+        tags=json.dumps(auto_tags(result, event_name)),
+        event_name=event_name,
+        location_lat=location_lat,
+        location_lng=location_lng,
+        location_name=location_name
+    )
@@ -11,10 +11,36 @@ MYSQL_HOST = os.getenv("DB_HOST", "localhost")
 MYSQL_PORT = os.getenv("DB_PORT", "3306")
 MYSQL_DB = os.getenv("DB_NAME", "cardmate_db")
 
+# Connection pool (per API worker process)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Recycle before MySQL's wait_timeout drops idle connections
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1").lower() in ("1", "true", "yes", "on")
+# SQL logging to stdout; for debugging only
+DB_ECHO = os.getenv("DB_ECHO", "0").lower() in ("1", "true", "yes", "on")
+# "aiomysql" or "asyncmy" enables the async engine used by get_async_session
+DB_ASYNC_DRIVER = os.getenv("DB_ASYNC_DRIVER", "")
+
 # Create the database URL
 DATABASE_URL = f"mysql+mysqlconnector://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}"
+ASYNC_DATABASE_URL = f"mysql+{DB_ASYNC_DRIVER}://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}"
+
+POOL_OPTIONS = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+}
+
+engine = create_engine(DATABASE_URL, echo=DB_ECHO, **POOL_OPTIONS)
 
-engine = create_engine(DATABASE_URL, echo=True)
+async_engine = None
+if DB_ASYNC_DRIVER:
+    from sqlalchemy.ext.asyncio import create_async_engine
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=DB_ECHO, **POOL_OPTIONS)
 
 def init_db():
     SQLModel.metadata.create_all(engine)
@@ -22,3 +48,16 @@ def init_db():
 def get_session():
     with Session(engine) as session:
         yield session
+
+async def get_async_session():
+    # For `async def` endpoints that await their queries instead of blocking a threadpool worker
+    if async_engine is None:
+        raise RuntimeError("Async database access needs DB_ASYNC_DRIVER (aiomysql or asyncmy)")
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+async def dispose_engines():
+    engine.dispose()
+    if async_engine is not None:
+        await async_engine.dispose()
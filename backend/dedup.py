@@ -0,0 +1,163 @@
+import json
+import os
+from typing import List, Optional
+
+from sqlalchemy import and_, or_
+from sqlmodel import Session, select
+
+from .models import BusinessCard, CardValue
+from .card_values import LIST_COLUMNS, card_value_rows, normalize, _load_list
+
+# What happens when a scan matches an existing contact: "hint" saves the new
+# card and reports the match, "merge" folds the scan into the existing card,
+# "off" skips the check
+DEDUP_MODE = os.getenv("DEDUP_MODE", "hint").lower()
+
+# CardValue kinds that identify a person: normalized email, E.164 phone and
+# the name+company fingerprint
+DEDUP_KINDS = ("email", "phone", "fingerprint")
+DEDUP_COLUMNS = ("emails", "phones")
+
+# Placeholder names the scan/create paths use when none was found
+PLACEHOLDER_NAMES = ("", "unknown", "unnamed")
+
+# ---------------------------
+# Detection
+# ---------------------------
+def dedup_keys(card: BusinessCard):
+    # (kind, value_norm) pairs of the card that point at the same contact
+    return [(kind, norm) for kind, _, norm in card_value_rows(card, DEDUP_COLUMNS) if kind in DEDUP_KINDS]
+
+def _lookup(session: Session, user_id: int, keys):
+    # {(kind, value_norm): {card_id, ...}} for the user's saved cards: one
+    # query on ix_cardvalue_lookup (user_id, kind, value_norm), an index seek
+    # per key however many cards the user has
+    by_kind = {}
+    for kind, norm in keys:
+        by_kind.setdefault(kind, set()).add(norm)
+    if not by_kind:
+        return {}
+    query = select(CardValue.card_id, CardValue.kind, CardValue.value_norm).where(
+        CardValue.user_id == user_id,
+        or_(*[and_(CardValue.kind == kind, CardValue.value_norm.in_(sorted(norms))) for kind, norms in by_kind.items()])
+    )
+    index = {}
+    # Pending cards are matched in memory by the caller; don't flush them one by one
+    with session.no_autoflush:
+        for card_id, kind, norm in session.exec(query).all():
+            index.setdefault((kind, norm), set()).add(card_id)
+    return index
+
+def _ranked(matches):
+    # Best matches first: most matching kinds, then oldest card
+    return [
+        {"card_id": card_id, "matched": sorted(kinds)}
+        for card_id, kinds in sorted(matches.items(), key=lambda m: (-len(m[1]), m[0]))
+    ]
+
+def find_duplicates(session: Session, card: BusinessCard) -> List[dict]:
+    keys = dedup_keys(card)
+    matches = {}
+    for key, card_ids in _lookup(session, card.user_id, keys).items():
+        for card_id in card_ids:
+            if card_id != card.id:
+                matches.setdefault(card_id, set()).add(key[0])
+    return _ranked(matches)
+
+# ---------------------------
+# Merging
+# ---------------------------
+def merge_cards(target: BusinessCard, source: BusinessCard) -> BusinessCard:
+    # Folds source into target: list columns are unioned (by normalized
+    # value, target's entries first), empty fields are filled in
+    for column, kind in LIST_COLUMNS.items():
+        merged = _load_list(getattr(target, column))
+        seen = {normalize(kind, v) for v in merged}
+        for value in _load_list(getattr(source, column)):
+            norm = normalize(kind, value)
+            if norm and norm not in seen:
+                seen.add(norm)
+                merged.append(value)
+        setattr(target, column, json.dumps(merged))
+
+    if (target.name or "").strip().lower() in PLACEHOLDER_NAMES and source.name:
+        target.name = source.name
+    for field in ("designation", "company", "event_name", "location_name", "location_lat", "location_lng"):
+        if getattr(target, field) in (None, "") and getattr(source, field) not in (None, ""):
+            setattr(target, field, getattr(source, field))
+    if source.notes and source.notes not in (target.notes or ""):
+        target.notes = f"{target.notes}\n{source.notes}" if target.notes else source.notes
+    target.ocr_avg_confidence = max(target.ocr_avg_confidence or 0.0, source.ocr_avg_confidence or 0.0)
+    target.is_favorite = bool(target.is_favorite or source.is_favorite)
+    return target
+
+# ---------------------------
+# Scan paths
+# ---------------------------
+def add_scanned_cards(session: Session, cards: List[BusinessCard], mode: Optional[str] = None):
+    # Adds freshly scanned cards to the session with one CardValue query per
+    # user and a single flush (the caller commits). Repeats within the list
+    # are caught in memory. Returns [(saved card, possible duplicates,
+    # merged?)]; in "merge" mode the saved card is the contact the scan was
+    # folded into (an existing card, or an earlier one from the same list).
+    mode = mode or DEDUP_MODE
+    if mode == "off":
+        session.add_all(cards)
+        session.flush()
+        return [(card, [], False) for card in cards]
+
+    card_keys = [dedup_keys(card) for card in cards]
+    # (user_id, kind, value_norm) -> refs: a saved card's id, or -(i + 1) for cards[i]
+    index = {}
+    for user_id in {card.user_id for card in cards}:
+        keys = {key for card, keys in zip(cards, card_keys) if card.user_id == user_id for key in keys}
+        for key, card_ids in _lookup(session, user_id, keys).items():
+            index[(user_id, *key)] = dict.fromkeys(sorted(card_ids))
+
+    targets = {}
+    if mode == "merge":
+        saved_ids = {ref for refs in index.values() for ref in refs}
+        if saved_ids:
+            targets = {c.id: c for c in session.exec(select(BusinessCard).where(BusinessCard.id.in_(saved_ids))).all()}
+
+    saved = []
+    matched = []
+    for i, (card, keys) in enumerate(zip(cards, card_keys)):
+        matches = {}
+        for key in keys:
+            for ref in index.get((card.user_id, *key), ()):
+                matches.setdefault(ref, set()).add(key[0])
+        ref = -(i + 1)
+        target = None
+        if mode == "merge" and matches:
+            # Most matching kinds wins; ties go to saved cards, then the earliest
+            best = max(matches, key=lambda r: (len(matches[r]), r > 0, -abs(r)))
+            target = targets.get(best) if best > 0 else saved[-best - 1]
+        if target is not None:
+            merge_cards(target, card)
+            ref = best
+        else:
+            session.add(card)
+            target = card
+        saved.append(target)
+        matched.append((matches, target is not card))
+        # Later cards in the list can match this one
+        for key in keys:
+            index.setdefault((card.user_id, *key), {})[ref] = None
+
+    session.flush()
+    results = []
+    for target, (matches, merged) in zip(saved, matched):
+        by_id = {}
+        for ref, kinds in matches.items():
+            card_id = ref if ref > 0 else saved[-ref - 1].id
+            by_id.setdefault(card_id, set()).update(kinds)
+        if merged:
+            # The card it was folded into is the result, not a possible duplicate
+            by_id.pop(target.id, None)
+        results.append((target, _ranked(by_id), merged))
+    return results
+
+def add_scanned_card(session: Session, card: BusinessCard, mode: Optional[str] = None):
+    # Single-card form of add_scanned_cards
+    return add_scanned_cards(session, [card], mode)[0]
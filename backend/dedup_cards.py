@@ -0,0 +1,88 @@
+from sqlmodel import create_engine, select, Session
+import argparse
+import os
+import sys
+from dotenv import load_dotenv
+
+# Add the project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.models import BusinessCard, CardValue
+from backend.dedup import DEDUP_KINDS, merge_cards
+import backend.card_values  # keeps CardValue rows in sync when merged cards are saved
+
+# Load database settings
+load_dotenv()
+MYSQL_USER = os.getenv("DB_USER", "root")
+MYSQL_PASSWORD = os.getenv("DB_PASSWORD", "")
+MYSQL_HOST = os.getenv("DB_HOST", "localhost")
+MYSQL_PORT = os.getenv("DB_PORT", "3306")
+MYSQL_DB = os.getenv("DB_NAME", "cardmate_db")
+
+DATABASE_URL = f"mysql+mysqlconnector://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}"
+engine = create_engine(DATABASE_URL)
+
+def duplicate_groups(session, user_id=None):
+    # Cards sharing an email, phone or name+company fingerprint, transitively
+    # (A shares a phone with B, B an email with C -> one group). Streams the
+    # cardvalue rows in ix_cardvalue_lookup order so equal keys are adjacent.
+    query = select(CardValue.user_id, CardValue.kind, CardValue.value_norm, CardValue.card_id).where(
+        CardValue.kind.in_(DEDUP_KINDS)
+    )
+    if user_id is not None:
+        query = query.where(CardValue.user_id == user_id)
+    query = query.order_by(CardValue.user_id, CardValue.kind, CardValue.value_norm, CardValue.card_id)
+
+    parent = {}
+    def find(x):
+        while parent.setdefault(x, x) != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    previous_key, first = None, None
+    for owner, kind, norm, card_id in session.exec(query).yield_per(5000):
+        key = (owner, kind, norm)
+        if key == previous_key:
+            parent[find(card_id)] = find(first)
+        else:
+            previous_key, first = key, card_id
+            find(card_id)
+
+    groups = {}
+    for card_id in parent:
+        groups.setdefault(find(card_id), []).append(card_id)
+    return sorted(sorted(ids) for ids in groups.values() if len(ids) > 1)
+
+def run(merge=False, user_id=None):
+    print(f"Connecting to {MYSQL_DB} on {MYSQL_HOST}...")
+    merged = 0
+    with Session(engine) as session:
+        groups = duplicate_groups(session, user_id)
+        print(f"Found {len(groups)} groups of duplicate cards.")
+        for ids in groups:
+            cards = session.exec(select(BusinessCard).where(BusinessCard.id.in_(ids)).order_by(BusinessCard.id)).all()
+            names = ", ".join(f"#{c.id} {c.name}" for c in cards)
+            if not merge:
+                print(f"  {names}")
+                continue
+            # The oldest card survives (keeping owner status, favorites and notes)
+            target, rest = cards[0], cards[1:]
+            for card in rest:
+                merge_cards(target, card)
+                target.is_owner = bool(target.is_owner or card.is_owner)
+                session.delete(card)
+            session.add(target)
+            session.commit()
+            merged += len(rest)
+            print(f"  Merged {names} -> #{target.id}")
+
+    if merge:
+        print(f"Done: {merged} duplicate cards merged.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find (and optionally merge) duplicate business cards")
+    parser.add_argument("--merge", action="store_true", help="merge each group into its oldest card")
+    parser.add_argument("--user", type=int, default=None, help="only this user id")
+    args = parser.parse_args()
+    run(merge=args.merge, user_id=args.user)
@@ -1,9 +1,11 @@
-from fastapi import FastAPI, UploadFile, File, Form, Depends, HTTPException, status
+from fastapi import FastAPI, UploadFile, File, Form, Depends, HTTPException, Request, status
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from sqlmodel import Session, select
+from sqlmodel import Session, select, and_, or_, delete, update
 import os
-import uuid
 import sys
+import asyncio
+import time
 from datetime import datetime
 from pydantic import BaseModel
 from typing import Optional, List
@@ -11,17 +13,44 @@ from typing import Optional, List
 # Add the project root to sys.path so we can import ml_ocr
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from .database import init_db, get_session
-from .models import BusinessCard, User
-from .auth import get_password_hash, verify_password, create_access_token, get_current_user
-from ml_ocr.ocr import extract_structured_from_image
+from .database import init_db, get_session, engine, dispose_engines
+from .models import BusinessCard, CardValue, User
+from .auth import get_password_hash, verify_password, create_access_token, get_current_user, auth_cache
+from .ocr_executor import ocr_executor, OCR_WARMUP
+from .cards import card_from_scan
+from .search import search_cards
+from .dedup import add_scanned_card, add_scanned_cards, find_duplicates
+from .card_values import normalize, replace_list_values  # importing also keeps CardValue rows in sync on flush
+from . import scan_jobs
+from .metrics import instrument_engine, track_executor, record_ocr_job
+from ml_ocr.metrics import install_metrics, observe_result, timed
 from contextlib import asynccontextmanager
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()
     print("Database initialized successfully.")
+    ocr_executor.start()
+    track_executor(ocr_executor)
+    print(f"OCR executor started ({ocr_executor.engine}, {ocr_executor.workers} workers, queue {ocr_executor.queue_size}).")
+    scan_jobs.start_scan_jobs()
+    # The model loads in the background; /ready reports when scans are fast
+    # (remote OCR servers warm themselves and are health-checked instead)
+    warmup = asyncio.create_task(_warm_up_ocr()) if OCR_WARMUP and ocr_executor.engine != "remote" else None
     yield
+    if warmup is not None:
+        warmup.cancel()
+    await scan_jobs.stop_scan_jobs()
+    await ocr_executor.aclose()
+    await dispose_engines()
+
+async def _warm_up_ocr():
+    start = time.perf_counter()
+    try:
+        await asyncio.to_thread(ocr_executor.warm_up)
+        print(f"OCR model loaded in {time.perf_counter() - start:.1f}s.")
+    except Exception as e:
+        print(f"OCR warm-up failed: {e}")
 
 app = FastAPI(title="CardMate API", lifespan=lifespan)
 
@@ -32,8 +61,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Prometheus /metrics, request latency and the optional Server-Timing header
+install_metrics(app)
+instrument_engine(engine)
+
 # --- Authentication Models ---
 class UserRegister(BaseModel):
     username: str
@@ -76,14 +110,12 @@ def login(login_data: UserLogin, session: Session = Depends(get_session)):
 
 @app.delete("/users/me")
 def delete_account(session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
-    # Delete all associated cards first
-    cards = session.exec(select(BusinessCard).where(BusinessCard.user_id == current_user.id)).all()
-    for card in cards:
-        session.delete(card)
-    
-    # Delete the user
-    session.delete(current_user)
+    email = current_user.email
+    # Delete all associated data first, then the user, in one transaction
+    _delete_user_cards(session, current_user.id)
+    session.exec(delete(User).where(User.id == current_user.id))
     session.commit()
+    auth_cache.invalidate(email)
     return {"message": "Account and all associated data deleted successfully"}
 
 # --- Business Card Endpoints ---
@@ -92,8 +124,19 @@ def delete_account(session: Session = Depends(get_session), current_user: User =
 def read_root():
     return {"message": "Welcome to CardMate Backend API", "status": "running"}
 
+@app.get("/ready")
+def readiness():
+    # Readiness probe: 503 until the OCR model is loaded (unless warm-up is disabled),
+    # or with remote OCR, until at least one OCR server is healthy
+    if ocr_executor.warm_error:
+        return JSONResponse(status_code=503, content={"status": "error", "detail": ocr_executor.warm_error})
+    if (OCR_WARMUP or ocr_executor.engine == "remote") and not ocr_executor.ready:
+        return JSONResponse(status_code=503, content={"status": "warming"}, headers={"Retry-After": str(ocr_executor.retry_after)})
+    return {"status": "ready", "ocr": "loaded" if ocr_executor.ready else "lazy"}
+
 @app.post("/scan")
 async def scan_card(
+    request: Request,
     file: UploadFile = File(...), 
     event_name: Optional[str] = Form(None),
     location_lat: Optional[float] = Form(None),
@@ -102,78 +145,371 @@ async def scan_card(
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    temp_path = f"temp_{uuid.uuid4().hex}_{file.filename}"
+    timings = request.state.timings
     try:
-        with open(temp_path, "wb") as buffer:
-            buffer.write(await file.read())
+        with timed("upload", timings):
+            contents = await file.read()
         
-        # Call the existing ML logic
-        result = extract_structured_from_image(temp_path)
+        # Call the existing ML logic on the OCR pool, off the event loop
+        start = time.perf_counter()
+        job = await ocr_executor.scan(contents)
+        record_ocr_job(job, time.perf_counter() - start, timings)
         
-        # Auto-Tagging Logic
-        tags = []
-        designation = (result.get("designation") or "").lower()
-        company = (result.get("company") or "").lower()
+        # Create and save BusinessCard (with auto-tags) associated with current user
+        with timed("build_card", timings):
+            card = card_from_scan(
+                job["data"], current_user.id,
+                event_name=event_name,
+                location_lat=location_lat,
+                location_lng=location_lng,
+                location_name=location_name
+            )
         
-        if any(x in designation for x in ["engineer", "developer", "architect", "cto", "tech"]):
-            tags.append("Tech")
-        if any(x in designation for x in ["ceo", "founder", "director", "president", "vp", "chief"]):
-            tags.append("Executive")
-        if any(x in designation for x in ["sales", "account", "business development", "rep"]):
-            tags.append("Sales")
-        if any(x in designation for x in ["marketing", "brand", "cmo"]):
-            tags.append("Marketing")
-        if any(x in designation for x in ["product", "manager"]):
-            tags.append("Product")
-        if any(x in designation for x in ["designer", "creative", "art", "ui", "ux"]):
-            tags.append("Design")
-        if "investor" in designation or "capital" in company:
-            tags.append("Investor")
-            
-        if event_name:
-            tags.append(event_name)
-            
-        # Create and save BusinessCard associated with current user
-        import json
-        card = BusinessCard(
-            name=result.get("name", "Unknown"),
-            designation=result.get("designation"),
-            company=result.get("company"),
-            phones=json.dumps(result.get("phones", [])),
-            emails=json.dumps(result.get("emails", [])),
-            addresses=json.dumps(result.get("addresses", [])),
-            websites=json.dumps(result.get("websites", [])),
-            ocr_avg_confidence=result.get("ocr_avg_confidence", 0.0),
-            user_id=current_user.id,
-            # New Features
-            tags=json.dumps(tags),
-            event_name=event_name,
-            location_lat=location_lat,
-            location_lng=location_lng,
-            location_name=location_name
-        )
+        with timed("db_save", timings):
+            # Matches an existing contact by email, phone or name+company?
+            # Blocking DB work, so it runs in a thread, off the event loop
+            card, duplicates, merged = await asyncio.to_thread(_save_scanned_card, session, card)
         
-        session.add(card)
-        session.commit()
-        session.refresh(card)
-        
-        return {"data": card}
+        return {"data": card, "possible_duplicates": duplicates, "merged": merged}
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error during scan: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+
+def _save_scanned_card(session: Session, card: BusinessCard):
+    card, duplicates, merged = add_scanned_card(session, card)
+    session.commit()
+    session.refresh(card)
+    return card, duplicates, merged
+
+# --- Batch Scan ---
+
+SCAN_BATCH_MAX_IMAGES = int(os.getenv("SCAN_BATCH_MAX_IMAGES", "200"))
+SCAN_BATCH_CHUNK_SIZE = int(os.getenv("SCAN_BATCH_CHUNK_SIZE", "8"))
+# Cap on the total uncompressed size of the images in one batch (zip bombs)
+SCAN_BATCH_MAX_MB = int(os.getenv("SCAN_BATCH_MAX_MB", "200"))
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp", ".tif", ".tiff")
+
+def _expand_batch_uploads(uploads):
+    # Flatten uploaded images and zip archives into (filename, contents) pairs.
+    # Archives are sized from their directory before anything is decompressed.
+    import io
+    import zipfile
+    max_bytes = SCAN_BATCH_MAX_MB * 1024 * 1024
+    archives = []
+    count = 0
+    total = 0
+    for filename, contents in uploads:
+        if (filename or "").lower().endswith(".zip") or zipfile.is_zipfile(io.BytesIO(contents)):
+            try:
+                archive = zipfile.ZipFile(io.BytesIO(contents))
+            except zipfile.BadZipFile:
+                raise HTTPException(status_code=400, detail=f"Invalid zip archive: {filename}")
+            members = [
+                m for m in archive.infolist()
+                if not m.is_dir()
+                and m.filename.lower().endswith(IMAGE_EXTENSIONS)
+                and not os.path.basename(m.filename).startswith(".")
+            ]
+            archives.append((filename, archive, members))
+            count += len(members)
+            total += sum(m.file_size for m in members)
+        else:
+            archives.append((filename, None, contents))
+            count += 1
+            total += len(contents)
+        if count > SCAN_BATCH_MAX_IMAGES:
+            raise HTTPException(status_code=413, detail=f"Too many images (max {SCAN_BATCH_MAX_IMAGES})")
+        if total > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Batch too large (max {SCAN_BATCH_MAX_MB} MB uncompressed)")
+
+    items = []
+    for filename, archive, entry in archives:
+        if archive is None:
+            items.append((filename, entry))
+            continue
+        with archive:
+            for member in entry:
+                try:
+                    # file_size comes from the archive's own directory; never
+                    # read past it in case the header lies
+                    with archive.open(member) as f:
+                        data = f.read(member.file_size + 1)
+                except (zipfile.BadZipFile, zipfile.LargeZipFile, RuntimeError, OSError):
+                    raise HTTPException(status_code=400, detail=f"Invalid zip archive: {filename}")
+                if len(data) > member.file_size:
+                    raise HTTPException(status_code=400, detail=f"Invalid zip archive: {filename}")
+                items.append((member.filename, data))
+    return items
+
+@app.post("/scan/batch")
+async def scan_batch(
+    files: List[UploadFile] = File(...),
+    event_name: Optional[str] = Form(None),
+    location_lat: Optional[float] = Form(None),
+    location_lng: Optional[float] = Form(None),
+    location_name: Optional[str] = Form(None),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    uploads = [(f.filename, await f.read()) for f in files]
+    # Decompression is CPU-bound; keep it off the event loop
+    items = await asyncio.to_thread(_expand_batch_uploads, uploads)
+    if not items:
+        raise HTTPException(status_code=400, detail="No images found in upload")
+
+    # Split into chunks so the OCR pool can work on several at once, but never
+    # take more than its worker count so single scans still get through.
+    chunks = [items[i:i + SCAN_BATCH_CHUNK_SIZE] for i in range(0, len(items), SCAN_BATCH_CHUNK_SIZE)]
+    limit = asyncio.Semaphore(ocr_executor.workers)
+
+    async def run_chunk(chunk):
+        async with limit:
+            try:
+                return await ocr_executor.scan_batch([c for _, c in chunk])
+            except HTTPException as e:
+                return [{"error": e.detail}] * len(chunk)
+            except Exception as e:
+                return [{"error": str(e)}] * len(chunk)
+
+    with timed("batch_ocr"):
+        chunk_results = await asyncio.gather(*(run_chunk(c) for c in chunks))
+    outcomes = [r for chunk in chunk_results for r in chunk]
+
+    # Insert every successful card in a single transaction
+    results = []
+    cards = []
+    for index, ((filename, _), outcome) in enumerate(zip(items, outcomes)):
+        entry = {"index": index, "filename": filename}
+        if "error" in outcome:
+            entry["error"] = outcome["error"]
+        else:
+            observe_result(outcome["data"])
+            card = card_from_scan(
+                outcome["data"], current_user.id,
+                event_name=event_name,
+                location_lat=location_lat,
+                location_lng=location_lng,
+                location_name=location_name
+            )
+            cards.append((entry, card))
+        results.append(entry)
+
+    if cards:
+        with timed("batch_db_save"):
+            # Blocking DB work, so it runs in a thread, off the event loop
+            await asyncio.to_thread(_save_batch_cards, session, cards)
+
+    # Scans folded into an existing card (DEDUP_MODE=merge) create no row
+    merged = sum(1 for entry, _ in cards if entry.get("merged"))
+    return {
+        "results": results,
+        "saved": len(cards) - merged,
+        "merged": merged,
+        "failed": len(results) - len(cards)
+    }
+
+def _save_batch_cards(session: Session, cards):
+    # cards: [(result entry, unsaved BusinessCard)]; fills in each entry
+    try:
+        # One duplicate lookup and one flush for the whole batch;
+        # repeats within the upload are caught too
+        saved = add_scanned_cards(session, [card for _, card in cards])
+        card_ids = [card.id for card, _, _ in saved]
+        for (entry, _), (_, duplicates, merged) in zip(cards, saved):
+            entry["possible_duplicates"], entry["merged"] = duplicates, merged
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        print(f"Error saving batch scan: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    # One SELECT reloads all committed rows instead of a refresh per card
+    rows = {c.id: c for c in session.exec(select(BusinessCard).where(BusinessCard.id.in_(card_ids))).all()}
+    for (entry, _), card_id in zip(cards, card_ids):
+        entry["data"] = rows.get(card_id)
+
+# --- Async Scan Jobs ---
+
+def _job_response(job: dict, session: Session):
+    card = session.get(BusinessCard, job["card_id"]) if job["card_id"] else None
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+        "data": card,
+        "possible_duplicates": find_duplicates(session, card) if card else []
+    }
+
+@app.post("/scan/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def create_scan_job(
+    file: UploadFile = File(...),
+    event_name: Optional[str] = Form(None),
+    location_lat: Optional[float] = Form(None),
+    location_lng: Optional[float] = Form(None),
+    location_name: Optional[str] = Form(None),
+    current_user: User = Depends(get_current_user)
+):
+    contents = await file.read()
+    params = {
+        "event_name": event_name,
+        "location_lat": location_lat,
+        "location_lng": location_lng,
+        "location_name": location_name
+    }
+    # The SQLite write may wait on another worker process's lock
+    job_id = await asyncio.to_thread(scan_jobs.scan_job_store.create, current_user.id, contents, file.filename, params)
+    scan_jobs.scan_job_runner.notify()
+    return {"job_id": job_id, "status": scan_jobs.STATUS_QUEUED, "stage": scan_jobs.STAGE_QUEUED}
+
+@app.get("/scan/jobs/{job_id}")
+def get_scan_job(
+    job_id: str,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    job = scan_jobs.scan_job_store.get(job_id, user_id=current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Scan job not found")
+    return _job_response(job, session)
+
+@app.get("/scan/jobs/{job_id}/events")
+async def stream_scan_job(
+    job_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    import json
+    from fastapi.encoders import jsonable_encoder
+
+    user_id = current_user.id
+    if not await asyncio.to_thread(scan_jobs.scan_job_store.get, job_id, user_id=user_id):
+        raise HTTPException(status_code=404, detail="Scan job not found")
+
+    def job_payload(job):
+        with Session(engine) as session:
+            return jsonable_encoder(_job_response(job, session))
+
+    async def events():
+        # Server-Sent Events: one event per stage change, closing once the job finishes.
+        # The SQLite and MySQL reads run in threads so polling never blocks the loop.
+        last = None
+        while not await request.is_disconnected():
+            job = await asyncio.to_thread(scan_jobs.scan_job_store.get, job_id, user_id=user_id)
+            if job is None:
+                break
+            state = (job["status"], job["stage"])
+            if state != last:
+                last = state
+                payload = await asyncio.to_thread(job_payload, job)
+                yield f"event: {job['status']}\ndata: {json.dumps(payload)}\n\n"
+            if job["status"] in scan_jobs.TERMINAL_STATUSES:
+                break
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+CARD_PAGE_MAX = int(os.getenv("CARD_PAGE_MAX", "500"))
+CARD_COLUMNS = {c.name: c for c in BusinessCard.__table__.columns}
+
+def _encode_cursor(created_at: datetime, card_id: int) -> str:
+    import base64
+    raw = f"{created_at.isoformat()}|{card_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_cursor(cursor: str):
+    import base64
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, card_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(card_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 @app.get("/cards")
 def get_all_cards(
+    response: Response,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    # Return cards sorted by newest first. With `limit`, one page is returned
+    # and the cursor for the next page (if any) is sent as X-Next-Cursor;
+    # `fields=name,company,designation` returns only those columns (plus id
+    # and created_at).
+    if fields:
+        names = ["id", "created_at"] + [f.strip() for f in fields.split(",") if f.strip() not in ("", "id", "created_at")]
+        unknown = [n for n in names if n not in CARD_COLUMNS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        query = select(*[CARD_COLUMNS[n] for n in dict.fromkeys(names)])
+    else:
+        query = select(BusinessCard)
+
+    # Keyset pagination on (created_at, id), served by ix_businesscard_user_created
+    query = query.where(BusinessCard.user_id == current_user.id)
+    if cursor:
+        created_at, card_id = _decode_cursor(cursor)
+        query = query.where(or_(
+            BusinessCard.created_at < created_at,
+            and_(BusinessCard.created_at == created_at, BusinessCard.id < card_id)
+        ))
+    query = query.order_by(BusinessCard.created_at.desc(), BusinessCard.id.desc())
+    if limit is not None:
+        limit = max(1, min(limit, CARD_PAGE_MAX))
+        query = query.limit(limit + 1)
+
+    rows = session.exec(query).all()
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(rows[-1].created_at, rows[-1].id)
+    if fields:
+        return [dict(row._mapping) for row in rows]
+    return rows
+
+@app.get("/cards/search")
+def search_all_cards(
+    q: str,
+    limit: int = 20,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    # Return cards sorted by newest first
-    cards = session.exec(select(BusinessCard).where(BusinessCard.user_id == current_user.id).order_by(BusinessCard.created_at.desc())).all()
-    return cards
+    # Prefix search over name, company, designation, emails, phones, tags,
+    # notes and event, best matches first (MySQL FULLTEXT in boolean mode)
+    return search_cards(session, current_user.id, q, limit=max(1, min(limit, CARD_PAGE_MAX)))
+
+@app.get("/cards/lookup")
+def lookup_cards(
+    phone: Optional[str] = None,
+    email: Optional[str] = None,
+    website: Optional[str] = None,
+    tag: Optional[str] = None,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    # Exact (normalized) match on one list value, e.g. ?email=Jane@Acme.com or
+    # ?phone=098765 43210 or ?tag=investor; served by ix_cardvalue_lookup
+    given = [(kind, value) for kind, value in
+             (("phone", phone), ("email", email), ("website", website), ("tag", tag)) if value]
+    if len(given) != 1:
+        raise HTTPException(status_code=400, detail="Give exactly one of phone, email, website or tag")
+    kind, value = given[0]
+    card_ids = select(CardValue.card_id).where(
+        CardValue.user_id == current_user.id,
+        CardValue.kind == kind,
+        CardValue.value_norm == normalize(kind, value)
+    )
+    return session.exec(
+        select(BusinessCard)
+        .where(BusinessCard.id.in_(card_ids))
+        .order_by(BusinessCard.created_at.desc(), BusinessCard.id.desc())
+    ).all()
 
 class CardUpdate(BaseModel):
     name: Optional[str] = None
@@ -208,10 +544,12 @@ def create_card_manual(
         user_id=current_user.id,
         is_owner=False # Will be set separately if needed, or by logic
     )
+    # Manually entered cards are never merged, only flagged
+    duplicates = find_duplicates(session, new_card)
     session.add(new_card)
     session.commit()
     session.refresh(new_card)
-    return {"message": "Card created", "data": new_card}
+    return {"message": "Card created", "data": new_card, "possible_duplicates": duplicates}
 
 # --- New Feature Endpoints ---
 
@@ -239,18 +577,8 @@ def set_owner(
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    # Unset existing owners FOR THIS USER
-    existing_owners = session.exec(select(BusinessCard).where(
-        BusinessCard.is_owner == True,
-        BusinessCard.user_id == current_user.id
-    )).all()
-    
-    for owner in existing_owners:
-        owner.is_owner = False
-        session.add(owner)
-    
     # Set new owner IF it belongs to the user
-    card = session.exec(select(BusinessCard).where(
+    card = session.exec(select(BusinessCard.id).where(
         BusinessCard.id == card_id,
         BusinessCard.user_id == current_user.id
     )).first()
@@ -258,8 +586,15 @@ def set_owner(
     if not card:
         raise HTTPException(status_code=404, detail="Card not found or not authorized")
     
-    card.is_owner = True
-    session.add(card)
+    # One UPDATE sets this card and unsets any other owner FOR THIS USER
+    session.exec(
+        update(BusinessCard)
+        .where(
+            BusinessCard.user_id == current_user.id,
+            or_(BusinessCard.is_owner == True, BusinessCard.id == card_id)
+        )
+        .values(is_owner=BusinessCard.id == card_id)
+    )
     session.commit()
     return {"message": "Card set as owner"}
 
@@ -269,12 +604,82 @@ def clear_all_cards(
     current_user: User = Depends(get_current_user)
 ):
     # Only delete cards for this user
-    cards = session.exec(select(BusinessCard).where(BusinessCard.user_id == current_user.id)).all()
-    for card in cards:
-        session.delete(card)
+    _delete_user_cards(session, current_user.id)
     session.commit()
     return {"message": "All your cards cleared successfully"}
 
+def _delete_user_cards(session: Session, user_id: int, card_ids: Optional[List[int]] = None):
+    # Set-based DELETEs: the CardValue rows go first, explicitly, since
+    # bulk statements bypass the ORM cascade. Returns the number of cards.
+    values = delete(CardValue).where(CardValue.user_id == user_id)
+    cards = delete(BusinessCard).where(BusinessCard.user_id == user_id)
+    if card_ids is not None:
+        values = values.where(CardValue.card_id.in_(card_ids))
+        cards = cards.where(BusinessCard.id.in_(card_ids))
+    session.exec(values)
+    return session.exec(cards).rowcount
+
+# --- Bulk Actions ---
+
+CARD_BULK_MAX = int(os.getenv("CARD_BULK_MAX", "1000"))
+BULK_ACTIONS = ("tag", "untag", "favorite", "unfavorite", "delete", "move_to_event")
+
+class CardBulkAction(BaseModel):
+    action: str
+    card_ids: List[int]
+    tags: Optional[List[str]] = None
+    event_name: Optional[str] = None
+
+@app.post("/cards/bulk")
+def bulk_update_cards(
+    bulk: CardBulkAction,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    # One transaction over many cards, e.g.
+    # {"action": "tag", "card_ids": [1, 2, 3], "tags": ["Investor"]}
+    import json
+    if bulk.action not in BULK_ACTIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown action (use one of {', '.join(BULK_ACTIONS)})")
+    if len(bulk.card_ids) > CARD_BULK_MAX:
+        raise HTTPException(status_code=413, detail=f"Too many cards (max {CARD_BULK_MAX})")
+    if bulk.action in ("tag", "untag") and not bulk.tags:
+        raise HTTPException(status_code=400, detail="tags is required for this action")
+    card_ids = list(set(bulk.card_ids))
+    # Statements are limited to the user's own cards; ids of other users' cards are ignored
+    mine = and_(BusinessCard.user_id == current_user.id, BusinessCard.id.in_(card_ids))
+
+    try:
+        if bulk.action == "delete":
+            count = _delete_user_cards(session, current_user.id, card_ids)
+        elif bulk.action in ("favorite", "unfavorite", "move_to_event"):
+            values = {"event_name": bulk.event_name} if bulk.action == "move_to_event" else {"is_favorite": bulk.action == "favorite"}
+            count = session.exec(update(BusinessCard).where(mine).values(**values)).rowcount
+        else:
+            # Tags are a JSON list: read just (id, tags), then one executemany UPDATE
+            changed = []
+            for card_id, raw in session.exec(select(BusinessCard.id, BusinessCard.tags).where(mine)).all():
+                current = json.loads(raw or "[]")
+                if bulk.action == "tag":
+                    lowered = {t.lower() for t in current}
+                    tags = current + [t for t in dict.fromkeys(bulk.tags) if t.lower() not in lowered]
+                else:
+                    removed = {t.lower() for t in bulk.tags}
+                    tags = [t for t in current if t.lower() not in removed]
+                if tags != current:
+                    changed.append((card_id, json.dumps(tags)))
+            if changed:
+                session.exec(update(BusinessCard), params=[{"id": i, "tags": t} for i, t in changed])
+                replace_list_values(session, "tags", [(i, current_user.id, t) for i, t in changed])
+            count = len(changed)
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        print(f"Error in bulk {bulk.action}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {"message": f"Bulk {bulk.action} applied", "updated": count}
+
 # --- New Feature Endpoints ---
 
 @app.put("/cards/{card_id}")
@@ -379,6 +784,7 @@ def update_settings(
         current_user.dark_mode = settings.dark_mode
     session.add(current_user)
     session.commit()
+    auth_cache.invalidate(current_user.email)
     return {"message": "Settings updated", "dark_mode": current_user.dark_mode}
 
 @app.get("/users/me")
@@ -0,0 +1,38 @@
+import time
+
+from sqlalchemy import event
+
+from ml_ocr.metrics import histogram, gauge, observe_stages, observe_result
+
+db_query_seconds = histogram("cardmate_db_query_seconds", "Database statement latency", ["statement"])
+ocr_queue_jobs = gauge("cardmate_ocr_queue_jobs", "OCR jobs held by the executor", ["state"])
+
+
+def instrument_engine(engine):
+    # Times every statement on the engine, labelled by its verb (SELECT, INSERT, ...)
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["query_start"].pop()
+        verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        db_query_seconds.labels(verb).observe(time.perf_counter() - start)
+
+
+def track_executor(executor):
+    # Sampled at scrape time, so the hot path pays nothing
+    ocr_queue_jobs.labels("running").set_function(lambda: min(executor.in_flight, executor.workers))
+    ocr_queue_jobs.labels("waiting").set_function(lambda: max(0, executor.in_flight - executor.workers))
+
+
+def record_ocr_job(job, elapsed, timings=None):
+    # job: {"data": ..., "timings": ...} from run_ocr_job; elapsed: wall time
+    # seen by the caller. Whatever the worker didn't account for was queueing.
+    stages = {f"ocr.{k}": v for k, v in job.get("timings", {}).items()}
+    stages["ocr.queue"] = max(0.0, elapsed - sum(job.get("timings", {}).values()))
+    observe_stages(stages)
+    observe_result(job.get("data"))
+    if timings is not None:
+        timings.update(stages)
@@ -0,0 +1,65 @@
+from sqlmodel import create_engine, text
+from types import SimpleNamespace
+import os
+import sys
+from dotenv import load_dotenv
+
+# Add the project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.models import CardValue
+from backend.card_values import card_value_rows
+
+# Load database settings
+load_dotenv()
+MYSQL_USER = os.getenv("DB_USER", "root")
+MYSQL_PASSWORD = os.getenv("DB_PASSWORD", "")
+MYSQL_HOST = os.getenv("DB_HOST", "localhost")
+MYSQL_PORT = os.getenv("DB_PORT", "3306")
+MYSQL_DB = os.getenv("DB_NAME", "cardmate_db")
+
+DATABASE_URL = f"mysql+mysqlconnector://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}"
+engine = create_engine(DATABASE_URL)
+
+BATCH_SIZE = 1000
+
+def run_migrations():
+    # Creates the cardvalue table and fills it from the JSON list columns.
+    # Safe to re-run: each batch replaces the rows of the cards it covers.
+    print(f"Connecting to {MYSQL_DB} on {MYSQL_HOST}...")
+    CardValue.__table__.create(engine, checkfirst=True)
+    print("Table 'cardvalue' is ready.")
+
+    columns = ["id", "user_id", "name", "company", "phones", "emails", "addresses", "websites", "tags"]
+    last_id = 0
+    total_cards = 0
+    total_values = 0
+    with engine.connect() as connection:
+        while True:
+            cards = connection.execute(
+                text(f"SELECT {', '.join(columns)} FROM businesscard WHERE id > :last ORDER BY id LIMIT :n"),
+                {"last": last_id, "n": BATCH_SIZE}
+            ).mappings().all()
+            if not cards:
+                break
+            ids = [c["id"] for c in cards]
+            rows = []
+            for c in cards:
+                card = SimpleNamespace(**c)
+                rows += [
+                    {"card_id": c["id"], "user_id": c["user_id"], "kind": kind, "value": value, "value_norm": norm}
+                    for kind, value, norm in card_value_rows(card)
+                ]
+            connection.execute(CardValue.__table__.delete().where(CardValue.__table__.c.card_id.in_(ids)))
+            if rows:
+                connection.execute(CardValue.__table__.insert(), rows)
+            connection.commit()
+            last_id = ids[-1]
+            total_cards += len(cards)
+            total_values += len(rows)
+            print(f"Indexed {total_cards} cards ({total_values} values)...")
+
+    print("Migration complete.")
+
+if __name__ == "__main__":
+    run_migrations()
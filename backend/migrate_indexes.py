@@ -0,0 +1,48 @@
+from sqlmodel import create_engine, text
+import os
+import sys
+from dotenv import load_dotenv
+
+# Add the project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Load database settings
+load_dotenv()
+MYSQL_USER = os.getenv("DB_USER", "root")
+MYSQL_PASSWORD = os.getenv("DB_PASSWORD", "")
+MYSQL_HOST = os.getenv("DB_HOST", "localhost")
+MYSQL_PORT = os.getenv("DB_PORT", "3306")
+MYSQL_DB = os.getenv("DB_NAME", "cardmate_db")
+
+DATABASE_URL = f"mysql+mysqlconnector://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}"
+engine = create_engine(DATABASE_URL)
+
+def run_migrations():
+    print(f"Connecting to {MYSQL_DB} on {MYSQL_HOST}...")
+    with engine.connect() as connection:
+        indexes_to_add = [
+            # GET /cards keyset pagination: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+            ("ix_businesscard_user_created", "", "businesscard", "(user_id, created_at)"),
+            # GET /cards/search (see backend/search.py SEARCH_COLUMNS)
+            ("ft_businesscard_search", "FULLTEXT", "businesscard",
+             "(name, company, designation, emails, phones, tags, notes, event_name)"),
+        ]
+
+        for index_name, kind, table, columns in indexes_to_add:
+            try:
+                print(f"Adding index '{index_name}'...")
+                query = text(f"CREATE {kind} INDEX {index_name} ON {table} {columns}")
+                connection.execute(query)
+                print(f"Successfully added '{index_name}'.")
+            except Exception as e:
+                err_msg = str(e).lower()
+                if "duplicate key name" in err_msg or "already exists" in err_msg or "1061" in err_msg:
+                    print(f"Index '{index_name}' already exists.")
+                else:
+                    print(f"Error adding '{index_name}': {e}")
+
+        connection.commit()
+    print("Migration complete.")
+
+if __name__ == "__main__":
+    run_migrations()
@@ -1,4 +1,4 @@
-from sqlmodel import SQLModel, Field, Relationship
+from sqlmodel import SQLModel, Field, Relationship, Index
 from typing import List, Optional
 from datetime import datetime
 import json
@@ -15,6 +15,9 @@ class User(SQLModel, table=True):
     cards: List["BusinessCard"] = Relationship(back_populates="user")
 
 class BusinessCard(SQLModel, table=True):
+    # Backs GET /cards: per-user listing, newest first (InnoDB appends id)
+    __table_args__ = (Index("ix_businesscard_user_created", "user_id", "created_at"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
     designation: Optional[str] = None
@@ -45,6 +48,12 @@ class BusinessCard(SQLModel, table=True):
     user_id: Optional[int] = Field(default=None, foreign_key="user.id")
     user: Optional[User] = Relationship(back_populates="cards")
 
+    # Indexed copy of the JSON list columns, kept in sync by backend/card_values.py
+    values: List["CardValue"] = Relationship(
+        back_populates="card",
+        sa_relationship_kwargs={"cascade": "all, delete-orphan"}
+    )
+
 
     def get_phones(self) -> List[str]:
         return json.loads(self.phones)
@@ -57,3 +66,17 @@ class BusinessCard(SQLModel, table=True):
 
     def get_websites(self) -> List[str]:
         return json.loads(self.websites)
+
+class CardValue(SQLModel, table=True):
+    # One row per phone/email/address/website/tag of a card, so lookups by
+    # value are index seeks instead of json.loads over every card
+    __table_args__ = (Index("ix_cardvalue_lookup", "user_id", "kind", "value_norm"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    card_id: int = Field(foreign_key="businesscard.id", index=True, ondelete="CASCADE")
+    user_id: int = Field(foreign_key="user.id")
+    kind: str = Field(max_length=16)  # phone, email, address, website, tag, fingerprint
+    value: str = Field(max_length=512)
+    value_norm: str = Field(max_length=255)
+
+    card: Optional[BusinessCard] = Relationship(back_populates="values")
@@ -0,0 +1,145 @@
+import asyncio
+import itertools
+import os
+
+import httpx
+from fastapi import HTTPException, status
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Configuration
+# Comma separated ml_ocr.server base URLs, e.g. "http://ocr-1:5000,http://ocr-2:5000".
+# When set, scans are sent to these nodes instead of running OCR in-process.
+OCR_SERVER_URLS = [u.strip().rstrip("/") for u in os.getenv("OCR_SERVER_URLS", "").split(",") if u.strip()]
+OCR_SERVER_TIMEOUT = float(os.getenv("OCR_SERVER_TIMEOUT", "60"))
+OCR_SERVER_CONNECT_TIMEOUT = float(os.getenv("OCR_SERVER_CONNECT_TIMEOUT", "2"))
+OCR_HEALTH_INTERVAL = float(os.getenv("OCR_HEALTH_INTERVAL", "10"))
+
+
+class OCRNodeError(Exception):
+    pass
+
+
+def _error_detail(response):
+    # FastAPI errors carry {"detail": ...}; proxies usually answer with HTML
+    try:
+        body = response.json()
+    except ValueError:
+        body = None
+    if isinstance(body, dict) and body.get("detail"):
+        return body["detail"]
+    return response.text or response.reason_phrase
+
+
+class OCRClient:
+    """
+    Sends scans to a pool of ml_ocr.server nodes over one keep-alive HTTP
+    client. Requests go round-robin over the nodes whose /health last
+    answered 200; a node that fails a request is taken out until the next
+    successful health check, and the request moves on to the next node.
+    """
+
+    def __init__(self, urls=OCR_SERVER_URLS, timeout: float = OCR_SERVER_TIMEOUT,
+                 connect_timeout: float = OCR_SERVER_CONNECT_TIMEOUT,
+                 health_interval: float = OCR_HEALTH_INTERVAL, max_connections: int = 32):
+        if not urls:
+            raise ValueError("OCRClient needs at least one server URL")
+        self.urls = list(urls)
+        self.health_interval = health_interval
+        self.healthy = set()
+        self._rr = itertools.cycle(self.urls)
+        self._timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self._limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self._client = None
+        self._health_task = None
+
+    @property
+    def any_healthy(self) -> bool:
+        return bool(self.healthy)
+
+    def start(self):
+        # Must be called from the event loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self._timeout, limits=self._limits)
+        if self._health_task is None:
+            self._health_task = asyncio.get_running_loop().create_task(self._health_loop())
+
+    async def aclose(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def check_health(self):
+        async def check(url):
+            try:
+                r = await self._client.get(f"{url}/health", timeout=OCR_SERVER_CONNECT_TIMEOUT)
+                return url, r.status_code == 200
+            except httpx.HTTPError:
+                return url, False
+        for url, ok in await asyncio.gather(*(check(u) for u in self.urls)):
+            if ok:
+                self.healthy.add(url)
+            else:
+                self.healthy.discard(url)
+
+    async def _health_loop(self):
+        while True:
+            await self.check_health()
+            await asyncio.sleep(self.health_interval)
+
+    def _pick(self, tried):
+        for _ in range(len(self.urls)):
+            url = next(self._rr)
+            if url in self.healthy and url not in tried:
+                return url
+        return None
+
+    async def _post(self, path, files):
+        # Round-robin over healthy nodes, failing over on transport errors and
+        # 5xx answers. A 4xx (e.g. a proxy's 413 for a huge photo, or a 422)
+        # is about the request, not the node: it goes straight back to the caller.
+        self.start()
+        if not self.healthy:
+            # Nothing known-good (e.g. first request after start-up): re-check now
+            await self.check_health()
+        tried = set()
+        last_error = None
+        while True:
+            url = self._pick(tried)
+            if url is None:
+                break
+            tried.add(url)
+            try:
+                r = await self._client.post(f"{url}{path}", files=files)
+                r.raise_for_status()
+                return r.json()
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code < 500:
+                    raise HTTPException(status_code=e.response.status_code, detail=_error_detail(e.response))
+                last_error = e
+            except httpx.TransportError as e:
+                last_error = e
+            self.healthy.discard(url)
+            print(f"OCR node {url} failed: {last_error}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="No OCR server available" + (f": {last_error}" if last_error else ""),
+            headers={"Retry-After": str(int(self.health_interval))},
+        )
+
+    async def scan(self, contents: bytes) -> dict:
+        # Same shape as ml_ocr.worker_pool.run_ocr_job: {"data": ..., "timings": ...}
+        body = await self._post("/ocr", {"file": ("card", contents)})
+        if "error" in body:
+            raise OCRNodeError(body["error"])
+        return {"data": body["data"], "timings": body.get("timings") or {}}
+
+    async def scan_batch(self, items) -> list:
+        # Same shape as ml_ocr.worker_pool.run_ocr_batch_job
+        body = await self._post("/ocr/batch", [("files", (f"card{i}", c)) for i, c in enumerate(items)])
+        return body["results"]
@@ -0,0 +1,204 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from fastapi import HTTPException, status
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Configuration
+# "thread" runs OCR in-process; "process" uses a farm of pre-warmed workers;
+# "remote" sends scans to the ml_ocr servers in OCR_SERVER_URLS (the default when that is set)
+OCR_ENGINE = os.getenv("OCR_ENGINE", "remote" if os.getenv("OCR_SERVER_URLS") else "thread").lower()
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(min(4, os.cpu_count() or 1))))
+OCR_QUEUE_SIZE = int(os.getenv("OCR_QUEUE_SIZE", "16"))
+OCR_RETRY_AFTER = int(os.getenv("OCR_RETRY_AFTER", "5"))
+# Load the OCR model in the background at start-up; 0 defers it to the first scan
+OCR_WARMUP = os.getenv("OCR_WARMUP", "1").lower() in ("1", "true", "yes", "on")
+
+
+class OCRExecutor:
+    """
+    Runs blocking OCR jobs on a dedicated worker pool so they never stall the
+    event loop. At most `workers` jobs run at once and at most `queue_size`
+    more may wait; anything beyond that is rejected with 503 + Retry-After.
+
+    With the "remote" engine the same limits apply to requests in flight to
+    the OCR servers, and scan()/scan_batch() go through an OCRClient.
+    """
+
+    def __init__(self, workers: int = OCR_WORKERS, queue_size: int = OCR_QUEUE_SIZE,
+                 retry_after: int = OCR_RETRY_AFTER, engine: str = OCR_ENGINE):
+        self.engine = engine
+        self.workers = max(1, workers)
+        self.queue_size = max(0, queue_size)
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+        self._pool = None
+        self.remote = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._ready = threading.Event()
+        self.warm_error = None
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def ready(self) -> bool:
+        if self.remote is not None:
+            return self.remote.any_healthy
+        return self._ready.is_set()
+
+    def start(self):
+        # Only creates the pool; models are loaded by warm_up() or the first job
+        if self.engine == "remote":
+            if self.remote is None:
+                from .ocr_client import OCRClient
+                self.remote = OCRClient()
+            self.remote.start()
+        elif self._pool is None:
+            if self.engine == "process":
+                from ml_ocr.worker_pool import OCRProcessPool
+                self._pool = OCRProcessPool(workers=self.workers)
+                self._pool.start(warm=False)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ocr")
+
+    def warm_up(self):
+        # Blocking: loads the Reader in every worker. Meant to run off the event loop.
+        self.start()
+        try:
+            if self.engine == "remote":
+                return
+            if self.engine == "process":
+                self._pool.warm_up()
+            else:
+                from ml_ocr.worker_pool import warm_reader
+                # Threads share one Reader, so a single load covers the pool
+                self._pool.submit(warm_reader).result()
+        except Exception as e:
+            self.warm_error = str(e)
+            raise
+        self._ready.set()
+
+    async def aclose(self):
+        if self.remote is not None:
+            await self.remote.aclose()
+            self.remote = None
+        self.shutdown()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def _release(self, _future):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def _acquire(self):
+        if not self._slots.acquire(blocking=False):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="OCR queue is full, please retry shortly",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+        with self._lock:
+            self._in_flight += 1
+
+    async def run(self, fn, *args, **kwargs):
+        return await self._submit(partial(fn, *args, **kwargs))
+
+    async def _submit(self, call, on_done=None, acquired=False):
+        # on_done(future) runs once the job has finished, e.g. to free its
+        # inputs; on_done(None) if it never got submitted. acquired: the
+        # caller already holds the job's slot.
+        if not acquired:
+            try:
+                self.start()
+                self._acquire()
+            except Exception:
+                if on_done is not None:
+                    on_done(None)
+                raise
+        counted = self.engine == "process"
+        if counted:
+            # Worker processes' cache counters are invisible to /metrics; ship them back
+            from ml_ocr.worker_pool import run_counted
+            call = partial(run_counted, call)
+        try:
+            future = self._pool.submit(call)
+        except Exception:
+            self._release(None)
+            if on_done is not None:
+                on_done(None)
+            raise
+        # The slot is freed when the job actually finishes, not when the
+        # awaiting request goes away, so disconnects can't overfill the pool.
+        future.add_done_callback(self._release)
+        if on_done is not None:
+            future.add_done_callback(on_done)
+        result = await asyncio.wrap_future(future)
+        if counted:
+            from ml_ocr.metrics import count_cache_lookups
+            result, lookups = result
+            count_cache_lookups(lookups)
+        # Any finished job proves the model is loaded
+        self._ready.set()
+        return result
+
+    async def _remote(self, call, arg):
+        self.start()
+        self._acquire()
+        try:
+            return await call(arg)
+        finally:
+            self._release(None)
+
+    async def scan(self, contents: bytes) -> dict:
+        # One image -> {"data": structured, "timings": {...}}
+        if self.engine == "remote":
+            return await self._remote(self.remote.scan, contents)
+        from ml_ocr.worker_pool import run_ocr_job, run_shared_ocr_job
+        if self._shared_memory:
+            return await self._run_shared(run_shared_ocr_job, [contents])
+        return await self.run(run_ocr_job, contents)
+
+    async def scan_batch(self, items) -> list:
+        # Several images -> one {"data": ...} or {"error": ...} per image
+        if self.engine == "remote":
+            return await self._remote(self.remote.scan_batch, items)
+        from ml_ocr.worker_pool import run_ocr_batch_job, run_shared_ocr_batch_job
+        if self._shared_memory:
+            return await self._run_shared(run_shared_ocr_batch_job, items)
+        return await self.run(run_ocr_batch_job, items)
+
+    @property
+    def _shared_memory(self) -> bool:
+        # Only worth it when the job crosses a process boundary
+        from ml_ocr.worker_pool import OCR_SHARED_MEMORY
+        return self.engine == "process" and OCR_SHARED_MEMORY
+
+    async def _run_shared(self, fn, items):
+        # The images go into one shared memory block; workers get its descriptor
+        from ml_ocr.worker_pool import SharedImages
+        # Take the slot first: a full queue answers 503 without ever
+        # copying the upload into a segment that would then need freeing
+        self.start()
+        self._acquire()
+        try:
+            block = SharedImages(items)
+        except Exception:
+            self._release(None)
+            raise
+        return await self._submit(partial(fn, block.descriptor), on_done=block.release, acquired=True)
+
+
+ocr_executor = OCRExecutor()
@@ -0,0 +1,344 @@
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlmodel import Session
+from dotenv import load_dotenv
+
+from .database import engine
+from .cards import card_from_scan
+from .dedup import add_scanned_card
+from .ocr_executor import ocr_executor
+from .metrics import record_ocr_job
+
+# Load environment variables
+load_dotenv()
+
+# Configuration
+SCAN_JOBS_DB = os.getenv("SCAN_JOBS_DB", os.path.join(os.path.dirname(__file__), "scan_jobs.db"))
+SCAN_JOBS_RETENTION_HOURS = int(os.getenv("SCAN_JOBS_RETENTION_HOURS", "24"))
+SCAN_JOBS_POLL_SECONDS = float(os.getenv("SCAN_JOBS_POLL_SECONDS", "1.0"))
+SCAN_JOBS_MAX_ATTEMPTS = int(os.getenv("SCAN_JOBS_MAX_ATTEMPTS", "3"))
+# A running job whose worker process stops renewing it for this long (crash,
+# kill -9) is put back in the queue by whichever process claims work next
+SCAN_JOBS_LEASE_SECONDS = int(os.getenv("SCAN_JOBS_LEASE_SECONDS", "120"))
+
+# Job lifecycle
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+TERMINAL_STATUSES = (STATUS_DONE, STATUS_FAILED)
+
+# Pipeline stages reported to clients
+STAGE_QUEUED = "queued"
+STAGE_OCR = "ocr"
+STAGE_SAVING = "saving"
+STAGE_DONE = "done"
+
+
+class ScanJobStore:
+    """
+    Local SQLite queue of scan jobs. The uploaded image is kept with the job
+    until it finishes so that a restart can pick in-flight scans back up.
+
+    Several API worker processes may share the file: a job is claimed by
+    exactly one of them (owner) and held under a lease that its runner
+    renews while the scan is in flight.
+    """
+
+    def __init__(self, path: str = SCAN_JOBS_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS scan_job (
+                id TEXT PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                filename TEXT,
+                image BLOB,
+                params TEXT NOT NULL DEFAULT '{}',
+                card_id INTEGER,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                owner TEXT,
+                lease_until TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        # Files created before leases existed
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(scan_job)")}
+        for column in ("owner", "lease_until"):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE scan_job ADD COLUMN {column} TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_scan_job_status ON scan_job (status, created_at)")
+
+    def _execute(self, query, args=()):
+        with self._lock:
+            return self._conn.execute(query, args)
+
+    def create(self, user_id: int, image: bytes, filename: Optional[str], params: dict) -> str:
+        job_id = uuid.uuid4().hex
+        now = datetime.utcnow().isoformat()
+        self._execute(
+            "INSERT INTO scan_job (id, user_id, status, stage, filename, image, params, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, user_id, STATUS_QUEUED, STAGE_QUEUED, filename, image, json.dumps(params), now, now),
+        )
+        return job_id
+
+    def get(self, job_id: str, user_id: Optional[int] = None):
+        query = "SELECT id, user_id, status, stage, filename, params, card_id, error, created_at, updated_at FROM scan_job WHERE id = ?"
+        args = [job_id]
+        if user_id is not None:
+            query += " AND user_id = ?"
+            args.append(user_id)
+        row = self._execute(query, args).fetchone()
+        return dict(row) if row else None
+
+    @staticmethod
+    def _lease_until():
+        return (datetime.utcnow() + timedelta(seconds=SCAN_JOBS_LEASE_SECONDS)).isoformat()
+
+    def claim_next(self, owner: str):
+        # Atomically move the oldest queued job to running, owned by `owner`.
+        # BEGIN IMMEDIATE takes SQLite's write lock up front, so two processes
+        # can never both see the same row as queued and claim it.
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = datetime.utcnow().isoformat()
+                self._requeue_expired(now)
+                while True:
+                    row = self._conn.execute(
+                        "SELECT * FROM scan_job WHERE status = ? ORDER BY created_at LIMIT 1", (STATUS_QUEUED,)
+                    ).fetchone()
+                    if row is None:
+                        self._conn.execute("COMMIT")
+                        return None
+                    if row["attempts"] >= SCAN_JOBS_MAX_ATTEMPTS:
+                        # Keeps crashing the worker; give up instead of looping forever
+                        self._conn.execute(
+                            "UPDATE scan_job SET status = ?, stage = ?, error = ?, image = NULL, owner = NULL, "
+                            "lease_until = NULL, updated_at = ? WHERE id = ?",
+                            (STATUS_FAILED, STAGE_DONE, "Scan failed after repeated attempts", now, row["id"]),
+                        )
+                        continue
+                    cur = self._conn.execute(
+                        "UPDATE scan_job SET status = ?, stage = ?, attempts = attempts + 1, owner = ?, "
+                        "lease_until = ?, updated_at = ? WHERE id = ? AND status = ?",
+                        (STATUS_RUNNING, STAGE_OCR, owner, self._lease_until(), now, row["id"], STATUS_QUEUED),
+                    )
+                    if cur.rowcount == 1:
+                        self._conn.execute("COMMIT")
+                        return dict(row)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _requeue_expired(self, now: str) -> int:
+        # Running jobs whose owner stopped renewing the lease (the process
+        # died) go back in the queue; live workers' jobs are left alone
+        cur = self._conn.execute(
+            "UPDATE scan_job SET status = ?, stage = ?, owner = NULL, lease_until = NULL "
+            "WHERE status = ? AND (lease_until IS NULL OR lease_until < ?)",
+            (STATUS_QUEUED, STAGE_QUEUED, STATUS_RUNNING, now),
+        )
+        return cur.rowcount
+
+    def renew(self, owner: str, job_ids) -> int:
+        # Extend the lease of jobs this owner is still working on
+        if not job_ids:
+            return 0
+        marks = ", ".join("?" for _ in job_ids)
+        cur = self._execute(
+            f"UPDATE scan_job SET lease_until = ? WHERE owner = ? AND status = ? AND id IN ({marks})",
+            (self._lease_until(), owner, STATUS_RUNNING, *job_ids),
+        )
+        return cur.rowcount
+
+    def update(self, job_id: str, **fields):
+        fields["updated_at"] = datetime.utcnow().isoformat()
+        columns = ", ".join(f"{k} = ?" for k in fields)
+        self._execute(f"UPDATE scan_job SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def requeue_expired(self) -> int:
+        with self._lock:
+            return self._requeue_expired(datetime.utcnow().isoformat())
+
+    def release(self, owner: str) -> int:
+        # On shutdown: this process's in-flight jobs go straight back in the
+        # queue instead of waiting for their lease to run out
+        cur = self._execute(
+            "UPDATE scan_job SET status = ?, stage = ?, owner = NULL, lease_until = NULL WHERE owner = ? AND status = ?",
+            (STATUS_QUEUED, STAGE_QUEUED, owner, STATUS_RUNNING),
+        )
+        return cur.rowcount
+
+    def purge_finished(self, older_than: timedelta) -> int:
+        cutoff = (datetime.utcnow() - older_than).isoformat()
+        cur = self._execute(
+            "DELETE FROM scan_job WHERE status IN (?, ?) AND updated_at < ?",
+            (*TERMINAL_STATUSES, cutoff),
+        )
+        return cur.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ScanJobRunner:
+    """Background loop that feeds queued jobs to the OCR executor."""
+
+    def __init__(self, store: ScanJobStore, concurrency: int):
+        self.store = store
+        self.concurrency = max(1, concurrency)
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._active = {}
+        self._saving = set()
+        # Unique per process (and per restart), recorded on claimed jobs
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._renewed = 0.0
+
+    def start(self):
+        recovered = self.store.requeue_expired()
+        purged = self.store.purge_finished(timedelta(hours=SCAN_JOBS_RETENTION_HOURS))
+        if recovered or purged:
+            print(f"Scan jobs: {recovered} recovered, {purged} purged.")
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in list(self._active):
+            task.cancel()
+        # Jobs already saving their card finish (and are marked done) first;
+        # requeueing them would save the card a second time
+        if self._saving:
+            await asyncio.gather(*list(self._saving), return_exceptions=True)
+        # Cancelled jobs go back in the queue for another (or the next) process
+        released = self.store.release(self.owner)
+        if released:
+            print(f"Scan jobs: {released} requeued on shutdown.")
+
+    def notify(self):
+        self._wakeup.set()
+
+    async def _loop(self):
+        while True:
+            while len(self._active) < self.concurrency:
+                # Off the event loop: claiming may wait for another process's write lock
+                job = await asyncio.to_thread(self.store.claim_next, self.owner)
+                if job is None:
+                    break
+                task = asyncio.create_task(self._process(job))
+                self._active[task] = job["id"]
+                task.add_done_callback(self._on_done)
+            if self._active and time.monotonic() - self._renewed > SCAN_JOBS_LEASE_SECONDS / 3:
+                await asyncio.to_thread(self.store.renew, self.owner, list(self._active.values()))
+                self._renewed = time.monotonic()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=SCAN_JOBS_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def _on_done(self, task):
+        self._active.pop(task, None)
+        self._wakeup.set()
+
+    async def _update(self, job_id: str, **fields):
+        # Store writes can wait on another process's lock; keep them off the loop
+        await asyncio.to_thread(self.store.update, job_id, **fields)
+
+    async def _process(self, job: dict):
+        job_id = job["id"]
+        params = json.loads(job["params"] or "{}")
+        try:
+            start = time.perf_counter()
+            result = await ocr_executor.scan(job["image"])
+            record_ocr_job(result, time.perf_counter() - start)
+        except HTTPException as e:
+            if e.status_code == 503:
+                # OCR pool is saturated by direct scans; try again later
+                await asyncio.sleep(ocr_executor.retry_after)
+                await self._update(job_id, status=STATUS_QUEUED, stage=STAGE_QUEUED, attempts=job["attempts"],
+                                   owner=None, lease_until=None)
+                return
+            await self._update(job_id, status=STATUS_FAILED, stage=STAGE_DONE, error=str(e.detail), image=None)
+            return
+        except Exception as e:
+            print(f"Error during scan job {job_id}: {e}")
+            await self._update(job_id, status=STATUS_FAILED, stage=STAGE_DONE, error=str(e), image=None)
+            return
+
+        await self._update(job_id, stage=STAGE_SAVING)
+        # Shielded from cancellation: once the save starts, the job is always
+        # marked done (or failed) by this process, never requeued
+        finish = asyncio.create_task(self._save(job_id, job["user_id"], result["data"], params))
+        self._saving.add(finish)
+        finish.add_done_callback(self._saving.discard)
+        await asyncio.shield(finish)
+
+    async def _save(self, job_id: str, user_id: int, data: dict, params: dict):
+        try:
+            card_id = await asyncio.to_thread(save_scanned_card, data, user_id, params)
+        except Exception as e:
+            print(f"Error saving scan job {job_id}: {e}")
+            await self._update(job_id, status=STATUS_FAILED, stage=STAGE_DONE, error=str(e), image=None)
+            return
+        await self._update(job_id, status=STATUS_DONE, stage=STAGE_DONE, card_id=card_id, image=None)
+
+
+def save_scanned_card(data: dict, user_id: int, params: dict) -> int:
+    with Session(engine) as session:
+        card = card_from_scan(data, user_id, **params)
+        # In DEDUP_MODE=merge the job points at the existing contact
+        card, _, _ = add_scanned_card(session, card)
+        session.commit()
+        return card.id
+
+
+# ---------------------------
+# Lifecycle
+# ---------------------------
+scan_job_store: Optional[ScanJobStore] = None
+scan_job_runner: Optional[ScanJobRunner] = None
+
+
+def start_scan_jobs():
+    global scan_job_store, scan_job_runner
+    scan_job_store = ScanJobStore()
+    scan_job_runner = ScanJobRunner(scan_job_store, concurrency=ocr_executor.workers)
+    scan_job_runner.start()
+
+
+async def stop_scan_jobs():
+    global scan_job_store, scan_job_runner
+    if scan_job_runner is not None:
+        await scan_job_runner.stop()
+        scan_job_runner = None
+    if scan_job_store is not None:
+        scan_job_store.close()
+        scan_job_store = None
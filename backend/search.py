@@ -0,0 +1,135 @@
+import re
+from typing import List
+
+from sqlalchemy import DDL, event, or_, and_
+from sqlmodel import Session, select
+
+from .models import BusinessCard, CardValue
+from .card_values import normalize_phone
+
+# Columns covered by the FULLTEXT index, and their weight in the fallback ranking
+SEARCH_COLUMNS = {
+    "name": 3,
+    "company": 2,
+    "designation": 2,
+    "emails": 2,
+    "phones": 2,
+    "tags": 1,
+    "notes": 1,
+    "event_name": 1,
+}
+FULLTEXT_INDEX = "ft_businesscard_search"
+# InnoDB's default innodb_ft_min_token_size: shorter words are not indexed
+FULLTEXT_MIN_TOKEN = 3
+# Digit words adding up to at least this many digits are looked up as a phone number
+PHONE_SEARCH_MIN_DIGITS = 5
+
+# New MySQL databases get the index with the table; existing ones via migrate_indexes.py
+event.listen(
+    BusinessCard.__table__,
+    "after_create",
+    DDL(f"CREATE FULLTEXT INDEX {FULLTEXT_INDEX} ON businesscard ({', '.join(SEARCH_COLUMNS)})").execute_if(dialect="mysql"),
+)
+
+
+def _columns():
+    return [getattr(BusinessCard, c) for c in SEARCH_COLUMNS]
+
+
+def search_terms(q: str) -> List[str]:
+    # Plain words only, so user input can never inject boolean-mode operators
+    return [t.lower() for t in re.findall(r"\w+", q or "")]
+
+
+def boolean_query(terms: List[str], require_all: bool = True) -> str:
+    # "jane acme" -> "+jane* +acme*": every word must prefix-match some column
+    prefix = "+" if require_all else ""
+    return " ".join(f"{prefix}{t}*" for t in terms)
+
+
+def _fulltext_search(session: Session, user_id: int, terms: List[str], limit: int, *filters):
+    from sqlalchemy.dialects.mysql import match
+    for require_all in (True, False):
+        # All words first; if nothing matches, any word (tolerates one typo'd word)
+        against = match(*_columns(), against=boolean_query(terms, require_all)).in_boolean_mode()
+        query = (
+            select(BusinessCard)
+            .where(BusinessCard.user_id == user_id, against, *filters)
+            .order_by(against.desc(), BusinessCard.created_at.desc())
+            .limit(limit)
+        )
+        cards = session.exec(query).all()
+        if cards or len(terms) == 1:
+            return cards
+    return []
+
+
+def _like_search(session: Session, user_id: int, terms: List[str], limit: int, *filters):
+    # Portable fallback (SQLite in development, or only very short words):
+    # every word must appear in some column, ranked by weighted column hits
+    conditions = [or_(*[col.contains(t, autoescape=True) for col in _columns()]) for t in terms]
+    cards = session.exec(
+        select(BusinessCard)
+        .where(BusinessCard.user_id == user_id, and_(*conditions), *filters)
+        .order_by(BusinessCard.created_at.desc())
+        .limit(limit * 20)
+    ).all()
+
+    def score(card):
+        total = 0
+        for column, weight in SEARCH_COLUMNS.items():
+            value = (getattr(card, column) or "").lower()
+            for t in terms:
+                if t in value:
+                    # Word-prefix hits rank above substring hits
+                    total += weight * (2 if re.search(rf"\b{re.escape(t)}", value) else 1)
+        return total
+
+    cards.sort(key=lambda c: (score(c), c.created_at), reverse=True)
+    return cards[:limit]
+
+
+def _phone_card_ids(user_id: int, digits: str):
+    # Cards with a phone containing these digits, via the normalized E.164
+    # cardvalue rows: "98765 43210", "9876543210" and "098765 43210" all
+    # find +919876543210, which FULLTEXT only knows as one long token
+    return select(CardValue.card_id).where(
+        CardValue.user_id == user_id,
+        CardValue.kind == "phone",
+        or_(
+            CardValue.value_norm == normalize_phone(digits),
+            CardValue.value_norm.contains(digits, autoescape=True)
+        )
+    )
+
+
+def _text_search(session: Session, user_id: int, terms: List[str], limit: int, *filters):
+    long_terms = [t for t in terms if len(t) >= FULLTEXT_MIN_TOKEN]
+    if session.get_bind().dialect.name == "mysql" and long_terms:
+        return _fulltext_search(session, user_id, long_terms, limit, *filters)
+    return _like_search(session, user_id, terms, limit, *filters)
+
+
+def search_cards(session: Session, user_id: int, q: str, limit: int = 20):
+    terms = search_terms(q)
+    if not terms:
+        return []
+    digits = "".join(t for t in terms if t.isdigit())
+    if len(digits) >= PHONE_SEARCH_MIN_DIGITS:
+        # The digit words are (part of) a phone number; any other words still
+        # have to match as usual, e.g. "jane 98765"
+        in_phone = BusinessCard.id.in_(_phone_card_ids(user_id, digits))
+        words = [t for t in terms if not t.isdigit()]
+        if words:
+            cards = _text_search(session, user_id, words, limit, in_phone)
+        else:
+            cards = session.exec(
+                select(BusinessCard)
+                .where(BusinessCard.user_id == user_id, in_phone)
+                .order_by(BusinessCard.created_at.desc())
+                .limit(limit)
+            ).all()
+        if cards:
+            return cards
+        # Not a phone after all (a postcode or year in the notes?): search text
+    return _text_search(session, user_id, terms, limit)
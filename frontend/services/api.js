@@ -138,6 +138,39 @@ export const getAllCards = async () => {
   }
 };
 
+// One page of cards, newest first. Pass the returned nextCursor to get the
+// following page (null when there is none); `fields` limits the columns,
+// e.g. ["name", "company", "designation"] for list rows.
+export const getCardsPage = async ({ limit = 50, cursor = null, fields = null } = {}) => {
+  try {
+    const headers = await getAuthHeaders();
+    const params = { limit };
+    if (cursor) params.cursor = cursor;
+    if (fields) params.fields = fields.join(",");
+    const response = await axios.get(`${BASE_URL}/cards`, { headers, params });
+    return { cards: response.data, nextCursor: response.headers["x-next-cursor"] || null };
+  } catch (error) {
+    if (error.response?.status !== 401) {
+      console.error("Fetch Cards Page Error:", error);
+    }
+    return { cards: [], nextCursor: null };
+  }
+};
+
+// Server-side search (prefix matching, best matches first)
+export const searchCards = async (query, limit = 20) => {
+  try {
+    const headers = await getAuthHeaders();
+    const response = await axios.get(`${BASE_URL}/cards/search`, { headers, params: { q: query, limit } });
+    return response.data;
+  } catch (error) {
+    if (error.response?.status !== 401) {
+      console.error("Search Cards Error:", error);
+    }
+    return [];
+  }
+};
+
 export const deleteCard = async (cardId) => {
   try {
     const headers = await getAuthHeaders();
@@ -160,6 +193,24 @@ export const clearAllCards = async () => {
   }
 };
 
+// One request for many cards: action is "tag", "untag", "favorite",
+// "unfavorite", "delete" or "move_to_event" (options: { tags, eventName })
+export const bulkUpdateCards = async (action, cardIds, { tags = null, eventName = null } = {}) => {
+  try {
+    const headers = await getAuthHeaders();
+    const response = await axios.post(`${BASE_URL}/cards/bulk`, {
+      action,
+      card_ids: cardIds,
+      tags,
+      event_name: eventName,
+    }, { headers });
+    return response.data.updated;
+  } catch (error) {
+    console.error("Bulk Update Error:", error);
+    return null;
+  }
+};
+
 export const setCardAsOwner = async (cardId) => {
   try {
     const headers = await getAuthHeaders();
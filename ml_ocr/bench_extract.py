@@ -0,0 +1,65 @@
+# Micro-benchmark for the text extractors on synthetic OCR dumps.
+#
+#   python -m ml_ocr.bench_extract [--sizes 125,250,500,1000] [--repeat 5]
+#
+# Inputs are built to hit the worst cases of phone grouping and address
+# de-duplication (many landline fragments, many distinct address blocks that
+# partly contain each other). With linear algorithms each doubling of the
+# line count should roughly double the time, i.e. "x prev" stays near 2.0.
+import argparse
+import random
+import time
+
+from ml_ocr.extract import extract_phones, extract_address, extract_fields
+
+
+def synthetic_lines(n, seed=0):
+    rnd = random.Random(seed)
+    lines = []
+    while len(lines) < n:
+        k = len(lines)
+        lines.append(rnd.choice([
+            f"No. {k}, {rnd.choice(['MG', 'Anna', 'Park'])} Road, Sector {k % 97}",
+            f"Tel: 044 {4000 + k % 6000} {1000 + k % 9000}",
+            f"080 {1000000 + k}",
+            f"Chennai - {600000 + k % 1000}",
+            f"sales{k}@acme.com",
+        ]))
+        # A plain text line ends the address block, so every block is its own candidate
+        lines.append(rnd.choice(["Jane Doe", "ACME LOGISTICS PVT LTD"]))
+    return lines[:n]
+
+
+def best_of(fn, arg, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="125,250,500,1000,2000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    benches = [
+        ("extract_phones", lambda lines: extract_phones("\n".join(lines))),
+        ("extract_address", extract_address),
+        ("extract_fields", extract_fields),
+    ]
+    print(f"{'function':<18}{'lines':>7}{'ms':>10}{'x prev':>8}")
+    for name, fn in benches:
+        prev = None
+        for n in sizes:
+            t = best_of(fn, synthetic_lines(n), args.repeat)
+            ratio = f"{t / prev:.2f}" if prev else "-"
+            print(f"{name:<18}{n:>7}{t * 1000:>10.2f}{ratio:>8}")
+            prev = t
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+# OCR pipeline benchmark over a golden corpus.
+#
+#   python -m ml_ocr.benchmark CORPUS_DIR [--out report.json] [--baseline old_report.json]
+#
+# CORPUS_DIR holds card images next to a same-named .json with the expected
+# fields, e.g. acme.jpg + acme.json:
+#   {"name": "Jane Doe", "designation": "CTO", "company": "ACME PVT LTD",
+#    "phones": ["+919876543210"], "emails": ["jane@acme.com"],
+#    "websites": ["www.acme.com"], "addresses": ["No. 12, MG Road, Chennai 600040"]}
+# Fields missing from the .json are not scored. Images without a .json are
+# still timed.
+#
+# Reports per-stage latency (load, qr, normalize, preprocess.*, detect,
+# recognize, parse), throughput, peak RSS and field-level precision/recall. The OCR
+# result cache is bypassed so every image really goes through the pipeline.
+#
+# To compare inference backends, save a torch run and diff an ONNX run against it:
+#   python -m ml_ocr.benchmark cards/ --out torch.json
+#   python -m ml_ocr.benchmark cards/ --backend onnx --quantize recognizer --baseline torch.json
+# The torch baseline is EasyOCR as shipped on CPU: fp32 CRAFT detector plus a
+# recognizer whose LSTM/Linear layers are dynamically quantized to INT8 by torch
+# (Reader(quantize=True)). The onnx backend starts from the fp32 recognizer, so
+# "--quantize recognizer" is the like-for-like comparison and "--quantize ''"
+# measures full fp32 precision.
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp", ".tif", ".tiff")
+SCALAR_FIELDS = ("name", "designation", "company")
+LIST_FIELDS = ("phones", "emails", "websites", "addresses")
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+# ---------------------------
+# Scoring
+# ---------------------------
+def normalize_value(field, value):
+    value = (value or "").strip()
+    if field == "phones":
+        return re.sub(r"\D", "", value)[-10:]
+    if field == "websites":
+        value = re.sub(r"^https?://", "", value.lower()).rstrip("/")
+        return value[4:] if value.startswith("www.") else value
+    return re.sub(r"\s+", " ", value).casefold()
+
+
+def score_field(field, predicted, expected):
+    # Returns (true positives, predicted count, expected count)
+    if field in SCALAR_FIELDS:
+        p = normalize_value(field, predicted)
+        e = normalize_value(field, expected)
+        return int(bool(p) and p == e), int(bool(p)), int(bool(e))
+    p = {normalize_value(field, v) for v in predicted or []} - {""}
+    e = {normalize_value(field, v) for v in expected or []} - {""}
+    return len(p & e), len(p), len(e)
+
+
+def precision_recall(tp, n_pred, n_exp):
+    precision = tp / n_pred if n_pred else (1.0 if not n_exp else 0.0)
+    recall = tp / n_exp if n_exp else 1.0
+    return precision, recall
+
+# ---------------------------
+# Run
+# ---------------------------
+def find_corpus(folder):
+    items = []
+    for name in sorted(os.listdir(folder)):
+        stem, ext = os.path.splitext(name)
+        if ext.lower() not in IMAGE_EXTENSIONS:
+            continue
+        expected_path = os.path.join(folder, stem + ".json")
+        expected = None
+        if os.path.exists(expected_path):
+            with open(expected_path, "r", encoding="utf-8") as f:
+                expected = json.load(f)
+        items.append((os.path.join(folder, name), expected))
+    return items
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "mean_ms": statistics.mean(samples) * 1000,
+        "p50_ms": samples[len(samples) // 2] * 1000,
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+        "max_ms": samples[-1] * 1000,
+    }
+
+
+def run(folder, warmup=True):
+    from ml_ocr.ocr import extract_structured, load_image, get_reader
+    from ml_ocr.onnx_backend import backend_name
+
+    items = find_corpus(folder)
+    if not items:
+        raise SystemExit(f"No images found in {folder}")
+
+    if warmup:
+        # Model loading is start-up cost, not per-scan latency
+        get_reader()
+
+    stage_samples = {}
+    field_counts = {f: [0, 0, 0] for f in SCALAR_FIELDS + LIST_FIELDS}
+    per_image = []
+    errors = 0
+    wall_start = time.perf_counter()
+    for path, expected in items:
+        timings = {}
+        entry = {"image": os.path.basename(path)}
+        start = time.perf_counter()
+        try:
+            with open(path, "rb") as f:
+                img = load_image(f.read())
+            load_time = time.perf_counter() - start
+            result = extract_structured(img, timings)
+            # The pipeline's own "load" is a no-op on an already decoded array
+            timings["load"] = load_time
+        except Exception as e:
+            errors += 1
+            entry["error"] = str(e)
+            per_image.append(entry)
+            continue
+        timings["total"] = time.perf_counter() - start
+        entry["timings_ms"] = {k: v * 1000 for k, v in timings.items()}
+        entry["result"] = result
+        for stage, seconds in timings.items():
+            stage_samples.setdefault(stage, []).append(seconds)
+
+        if expected:
+            entry["fields"] = {}
+            for field in field_counts:
+                if field not in expected:
+                    continue
+                tp, n_pred, n_exp = score_field(field, result.get(field), expected[field])
+                counts = field_counts[field]
+                counts[0] += tp; counts[1] += n_pred; counts[2] += n_exp
+                entry["fields"][field] = {"tp": tp, "predicted": n_pred, "expected": n_exp}
+        per_image.append(entry)
+    wall = time.perf_counter() - wall_start
+
+    accuracy = {}
+    for field, (tp, n_pred, n_exp) in field_counts.items():
+        if n_pred or n_exp:
+            precision, recall = precision_recall(tp, n_pred, n_exp)
+            accuracy[field] = {"precision": precision, "recall": recall, "tp": tp, "predicted": n_pred, "expected": n_exp}
+
+    return {
+        "corpus": os.path.abspath(folder),
+        "backend": backend_name(),
+        "images": len(items),
+        "errors": errors,
+        "wall_s": wall,
+        "throughput_per_s": (len(items) - errors) / wall if wall else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": {stage: summarize(samples) for stage, samples in stage_samples.items()},
+        "accuracy": accuracy,
+        "per_image": per_image,
+    }
+
+# ---------------------------
+# Output
+# ---------------------------
+def fmt_delta(new, old, lower_is_better):
+    if old is None:
+        return ""
+    delta = new - old
+    better = delta < 0 if lower_is_better else delta > 0
+    pct = f"{(delta / old * 100):+.1f}%" if old else f"{delta:+.3f}"
+    return f"  ({pct}{' better' if better and delta else ''})"
+
+
+def print_report(report, baseline=None):
+    base_stages = (baseline or {}).get("stages", {})
+    base_acc = (baseline or {}).get("accuracy", {})
+    print(f"Corpus: {report['corpus']}")
+    print(f"Backend: {report.get('backend', 'torch')}"
+          + (f"  (baseline: {baseline.get('backend', 'torch')})" if baseline else ""))
+    print(f"Images: {report['images']}  errors: {report['errors']}  wall: {report['wall_s']:.2f}s  "
+          f"throughput: {report['throughput_per_s']:.2f} img/s"
+          + fmt_delta(report["throughput_per_s"], (baseline or {}).get("throughput_per_s"), False))
+    if report["peak_rss_mb"] is not None:
+        print(f"Peak RSS: {report['peak_rss_mb']:.0f} MB"
+              + fmt_delta(report["peak_rss_mb"], (baseline or {}).get("peak_rss_mb"), True))
+
+    print(f"\n{'stage':<28}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+    for stage, s in sorted(report["stages"].items(), key=lambda kv: -kv[1]["mean_ms"]):
+        old = base_stages.get(stage, {}).get("p50_ms")
+        print(f"{stage:<28}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['mean_ms']:>10.1f}"
+              + fmt_delta(s["p50_ms"], old, True))
+
+    if report["accuracy"]:
+        print(f"\n{'field':<14}{'precision':>10}{'recall':>10}")
+        for field, a in report["accuracy"].items():
+            old = base_acc.get(field, {})
+            print(f"{field:<14}{a['precision']:>10.3f}{a['recall']:>10.3f}"
+                  + fmt_delta(a["recall"], old.get("recall"), False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the OCR pipeline on a folder of card images.")
+    parser.add_argument("corpus", help="folder of images with expected <name>.json files")
+    parser.add_argument("--out", help="write the full JSON report here")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    parser.add_argument("--backend", choices=["torch", "onnx"], help="inference backend (default: OCR_BACKEND)")
+    parser.add_argument("--quantize", choices=["", "recognizer", "all"], help="INT8 quantization for --backend onnx")
+    args = parser.parse_args()
+
+    # Read by ml_ocr.onnx_backend when the pipeline is first imported in run()
+    if args.backend:
+        os.environ["OCR_BACKEND"] = args.backend
+    if args.quantize is not None:
+        os.environ["OCR_ONNX_QUANTIZE"] = args.quantize
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    report = run(args.corpus)
+    print_report(report, baseline)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
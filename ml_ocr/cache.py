@@ -0,0 +1,203 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from ml_ocr.metrics import ocr_cache_lookups
+
+# ---------------------------
+# Configuration
+# ---------------------------
+OCR_CACHE_SIZE = int(os.getenv("OCR_CACHE_SIZE", "256"))          # in-process entries, 0 disables
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR", "")                    # empty disables the disk tier
+OCR_CACHE_DISK_MB = int(os.getenv("OCR_CACHE_DISK_MB", "256"))
+# Detected text boxes, reused when the same image is recognized again
+OCR_BOX_CACHE_SIZE = int(os.getenv("OCR_BOX_CACHE_SIZE", "256"))
+# Writes between re-scans of the cache directory, which other processes
+# (OCR workers, API workers) fill too
+DISK_RESCAN_EVERY = 64
+
+# ---------------------------
+# Keys
+# ---------------------------
+def image_digest(image):
+    # sha256 of the encoded bytes (paths are read, arrays hashed with their shape)
+    h = hashlib.sha256()
+    if isinstance(image, np.ndarray):
+        h.update(f"{image.shape}{image.dtype}".encode())
+        h.update(np.ascontiguousarray(image).data)
+    elif isinstance(image, (bytes, bytearray, memoryview)):
+        h.update(image)
+    else:
+        with open(image, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    return h.hexdigest()
+
+# ---------------------------
+# Cache
+# ---------------------------
+class ResultCache:
+    """
+    Two-tier cache of OCR results (structured fields, or detected boxes). Tier 1 is an in-process LRU,
+    tier 2 an optional directory of JSON files evicted oldest-first once it
+    grows past `disk_bytes`. Values are stored as JSON so every hit hands
+    back a fresh copy.
+
+    The directory is shared by every process pointed at it: lookups go to
+    the file itself, and eviction works from a re-scan of the directory so
+    the size limit holds for all processes together.
+    """
+
+    def __init__(self, size=OCR_CACHE_SIZE, disk_dir=OCR_CACHE_DIR, disk_bytes=OCR_CACHE_DISK_MB * 1024 * 1024, name="result"):
+        self.name = name   # "cache" label of the lookup metrics
+        self.size = size
+        self.disk_dir = disk_dir or None
+        self.disk_bytes = disk_bytes
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._disk_index = OrderedDict()   # key -> file size, oldest first
+        self._disk_total = 0
+        self._disk_writes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._load_disk_index()
+
+    @property
+    def enabled(self):
+        return self.size > 0 or self.disk_dir is not None
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _load_disk_index(self):
+        # (Re)builds the index from the directory, oldest (least recently used) first
+        self._disk_index.clear()
+        self._disk_total = 0
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.disk_dir, name))
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, name[:-5], st.st_size))
+        for _, key, size in sorted(entries):
+            self._disk_index[key] = size
+            self._disk_total += size
+
+    def _remember(self, key, payload):
+        if self.size <= 0:
+            return
+        self._memory[key] = payload
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.size:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            payload = self._memory.get(key)
+            if payload is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                ocr_cache_lookups.labels(self.name, "hit").inc()
+                return json.loads(payload)
+
+            if self.disk_dir:
+                # Straight to the file: another process may have written it
+                try:
+                    with open(self._path(key), "r", encoding="utf-8") as f:
+                        payload = f.read()
+                    value = json.loads(payload)
+                    os.utime(self._path(key))
+                except (OSError, ValueError):
+                    self._disk_total -= self._disk_index.pop(key, 0)
+                else:
+                    self._disk_total += len(payload.encode("utf-8")) - self._disk_index.pop(key, 0)
+                    self._disk_index[key] = len(payload.encode("utf-8"))
+                    self._remember(key, payload)
+                    self.disk_hits += 1
+                    ocr_cache_lookups.labels(self.name, "disk_hit").inc()
+                    return value
+
+            self.misses += 1
+            ocr_cache_lookups.labels(self.name, "miss").inc()
+            return None
+
+    def put(self, key, value):
+        payload = json.dumps(value)
+        with self._lock:
+            self._remember(key, payload)
+            if not self.disk_dir:
+                return
+            data = payload.encode("utf-8")
+            tmp_path = self._path(key) + f".{os.getpid()}.tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, self._path(key))
+            except OSError:
+                return
+            self._disk_total += len(data) - self._disk_index.pop(key, 0)
+            self._disk_index[key] = len(data)
+            self._disk_writes += 1
+            if self._disk_total > self.disk_bytes or self._disk_writes % DISK_RESCAN_EVERY == 0:
+                # Count (and evict) what the other processes wrote as well
+                self._load_disk_index()
+            while self._disk_total > self.disk_bytes and self._disk_index:
+                old_key, old_size = self._disk_index.popitem(last=False)
+                self._disk_total -= old_size
+                try:
+                    os.remove(self._path(old_key))
+                except FileNotFoundError:
+                    pass
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self.disk_dir:
+                self._load_disk_index()
+            for key in list(self._disk_index):
+                try:
+                    os.remove(self._path(key))
+                except FileNotFoundError:
+                    pass
+            self._disk_index.clear()
+            self._disk_total = 0
+
+    def counts(self):
+        with self._lock:
+            return {"hit": self.hits, "disk_hit": self.disk_hits, "miss": self.misses}
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": len(self._disk_index),
+                "disk_bytes": self._disk_total
+            }
+
+
+result_cache = ResultCache()
+box_cache = ResultCache(
+    size=OCR_BOX_CACHE_SIZE,
+    disk_dir=os.path.join(OCR_CACHE_DIR, "boxes") if OCR_CACHE_DIR else "",
+    name="boxes",
+)
+
+
+def cache_counts():
+    # Lookup counters of this process's caches, by cache name
+    return {cache.name: cache.counts() for cache in (result_cache, box_cache)}
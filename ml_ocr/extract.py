@@ -0,0 +1,408 @@
+# Field extraction from OCR text lines.
+#
+# Every pattern and keyword list is compiled once at import. Keyword lists are
+# folded into a single alternation so "does this line contain any keyword" is
+# one regex scan instead of a Python loop over substrings. Each extractor still
+# makes its own pass over the lines, but a card's lower-cased lines, joined
+# text and all-caps flags are computed once (TextFeatures) and shared.
+import re
+from collections import OrderedDict
+
+
+def keyword_matcher(keywords, flags=0):
+    # Substring semantics of any(k in s for k in keywords), as one compiled scan
+    alternation = "|".join(re.escape(k) for k in sorted(set(keywords), key=len, reverse=True))
+    return re.compile(alternation, flags)
+
+# ---------------------------
+# Patterns
+# ---------------------------
+WHITESPACE_RE = re.compile(r"\s+")
+NON_DIGIT_RE = re.compile(r"\D")
+
+TLDS = r"(com|in|net|org|co|biz|info|edu|gov|io|tech|me|app|co\.in)"
+# Match with optional spaces around @
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+\-]+\s*@\s*[A-Za-z0-9.\-]+\.[A-Za-z]{2,}")
+# Catch common OCR mistakes for @ like & or (a) or circles
+EMAIL_FALLBACK_RE = re.compile(
+    r"[A-Za-z0-9._%+\-]+(?:@|\(at\)|\[at\]|\(@|&|\(a\)|©)[A-Za-z0-9.\-]+(?:com|in|net|org|co|biz|info|edu|gov|io|tech|me|app|co\.in)\b",
+    re.I
+)
+EMAIL_SEPARATOR_RE = re.compile(r"(\(at\)|\[at\]|\(@|&|\(a\)|©)")
+EMAIL_TLD_RE = re.compile(TLDS + r"$")
+
+PHONE_RE = re.compile(r"(?:\+?\d[\d\-\s\(\)]{6,}\d)")
+PHONE_CLEAN_RE = re.compile(r"[^\d+]")
+DIGIT_GROUP_RE = re.compile(r"\b\d{2,8}\b")
+# Strict Area Code Filter: Only group if it looks like a real Indian area code (044, 080, 022, 011, etc.)
+INDIAN_AREA_CODES = frozenset(["044", "080", "022", "011", "033", "040", "020", "0120", "0124"])
+
+WWW_SPACED_RE = re.compile(r"w\s*w\s*w\s*[.,]\s*", re.I)
+WEB_RE = re.compile(
+    r"(https?://[A-Za-z0-9\-\._~:/\?#\[\]@!$&'()*+,;=%]+|www\.[A-Za-z0-9\-\._]+\.[A-Za-z]{2,}|[A-Za-z0-9\-\._]+\.(com|in|net|org|co|biz|info|io|tech|me|app)\b)"
+)
+
+NAME_REJECT_RE = re.compile(r"\d|@|www\.|http")
+# Exclude address and company keywords
+NAME_BAD_KEYWORDS_RE = re.compile(
+    r"\b(nagar|street|road|lane|tower|park|floor|block|sector|ltd|pvt|corp|inc|solutions|services|technologies|architects|associates|st\.|rd\.|logistics|department|dept|office)\b",
+    re.I
+)
+NAME_WORD_SPLIT_RE = re.compile(r"[\s\.]+")
+
+JOB_KEYWORDS_RE = keyword_matcher([
+    "engineer","manager","director","executive","consultant","founder",
+    "ceo","cto","cfo","president","vp","vice","coordinator","lead",
+    "head","officer","architect","developer","designer","specialist",
+    "supervisor","sales","marketing","operations","administrator","proprietor",
+    "partner","owner","principal","representative","development","business",
+    "secretary","assistant"
+])
+WEB_MARKER_RE = re.compile(r"www\.|http")
+JOB_COMPANY_RE = re.compile(r"\b(pvt|ltd|llp|inc|industries|solutions|corp)\b")
+
+COMPANY_SUFFIX_RE = re.compile(
+    r"\b(pvt\.?\s*ltd|private limited|ltd\.?|llp\b|inc\.?|industries|corporation|technologies|solutions|services)\b",
+    re.I
+)
+
+ADDRESS_KEYWORDS_RE = keyword_matcher([
+    "road","street","st.","rd.","nagar","lane","tower","park","sector","phase","building","block",
+    "pincode","pin","near","opp","chennai","bangalore","coimbatore","kolkata","mumbai",
+    "delhi","hyderabad","no.","no","nos","addr","village","industrial","estate"
+])
+PINCODE_RE = re.compile(r"\b\d{6}\b")
+ADDRESS_CONTINUATION_RE = re.compile(r"\d|,|-")
+ADDRESS_CONTINUATION_KEYWORDS_RE = keyword_matcher(["road","street","nagar","tower","floor","level"])
+CONTACT_LABELS_RE = keyword_matcher(["tel:", "fax:", "mob:", "ph:", "phone:", "email:"])
+ADDRESS_MARKERS_RE = keyword_matcher(["no", "level", "unit", "floor", "highway", "tower", "lane", "building", "anmol"])
+SEGMENT_SPLIT_RE = re.compile(r"[,;]+")
+DOUBLE_COMMA_RE = re.compile(r",\s*,")
+
+# Address candidate count above which de-duplication switches from the
+# pairwise substring check to a SubstringIndex
+SUBSTRING_INDEX_MIN = 8
+
+# ---------------------------
+# Shared line features
+# ---------------------------
+class TextFeatures:
+    """One card's OCR lines with the derived forms several extractors need, computed once."""
+
+    def __init__(self, lines):
+        self.lines = list(lines)
+        self.lower = [ln.lower() for ln in self.lines]
+        self.full_text = "\n".join(self.lines)
+        self._caps_flags = None
+
+    @property
+    def caps_flags(self):
+        if self._caps_flags is None:
+            self._caps_flags = [is_all_caps_line(ln) for ln in self.lines]
+        return self._caps_flags
+
+
+def as_features(lines):
+    return lines if isinstance(lines, TextFeatures) else TextFeatures(lines)
+
+
+class SubstringIndex:
+    """
+    Suffix automaton over a set of strings. count(p) returns how many times p
+    occurs across all of them in O(len(p)), after an O(total length) build.
+    """
+
+    SEPARATOR = "\x00"
+
+    def __init__(self, texts):
+        length, link, trans, occ = [0], [-1], [{}], [0]
+        last = 0
+        for ch in self.SEPARATOR.join(texts):
+            cur = len(length)
+            length.append(length[last] + 1); link.append(-1); trans.append({}); occ.append(1)
+            p = last
+            while p != -1 and ch not in trans[p]:
+                trans[p][ch] = cur
+                p = link[p]
+            if p == -1:
+                link[cur] = 0
+            else:
+                q = trans[p][ch]
+                if length[p] + 1 == length[q]:
+                    link[cur] = q
+                else:
+                    clone = len(length)
+                    length.append(length[p] + 1); link.append(link[q]); trans.append(dict(trans[q])); occ.append(0)
+                    while p != -1 and trans[p].get(ch) == q:
+                        trans[p][ch] = clone
+                        p = link[p]
+                    link[q] = clone
+                    link[cur] = clone
+            last = cur
+
+        # Push end-position counts up the suffix links, longest states first (bucket order)
+        buckets = [[] for _ in range(length[last] + 1)]
+        for state in range(1, len(length)):
+            buckets[length[state]].append(state)
+        for bucket in reversed(buckets):
+            for state in bucket:
+                occ[link[state]] += occ[state]
+        self._trans = trans
+        self._occ = occ
+
+    def count(self, pattern):
+        state = 0
+        for ch in pattern:
+            state = self._trans[state].get(ch)
+            if state is None:
+                return 0
+        return self._occ[state]
+
+# ---------------------------
+# Extraction functions
+# ---------------------------
+def extract_emails(full_text):
+    emails = EMAIL_RE.findall(full_text)
+    if emails:
+        return list(OrderedDict.fromkeys([e.replace(" ", "") for e in emails]))
+
+    compressed = WHITESPACE_RE.sub("", full_text)
+    fixed = []
+    for c in EMAIL_FALLBACK_RE.findall(compressed):
+        # Normalize the separator
+        c2 = EMAIL_SEPARATOR_RE.sub("@", c)
+        # Fix missing dot before TLD
+        c2 = EMAIL_TLD_RE.sub(r".\1", c2)
+        # Avoid double dots and handle dots read as commas
+        c2 = c2.replace(",com", ".com").replace(",in", ".in").replace("..", ".")
+        fixed.append(c2.lower())
+    return list(OrderedDict.fromkeys(fixed))
+
+def extract_phones(full_text):
+    phones = []
+    # Match various phone formats but ignore 6-digit numbers that look like pincodes
+    for p in PHONE_RE.findall(full_text):
+        cleaned = PHONE_CLEAN_RE.sub("", p)
+        digits_only = cleaned.replace("+", "")
+        # Avoid common pincodes (6 digits) and very short/long numbers
+        if (len(digits_only) >= 10 and len(digits_only) <= 13) or (len(digits_only) in [7, 8]):
+            phones.append(cleaned)
+    # Group landline segments if city code is separate (e.g. 044 - 4689 2301)
+    # Numbers already found, without "+", so combined segments aren't added twice
+    known = {p.replace("+", "") for p in phones}
+    parts = DIGIT_GROUP_RE.findall(full_text)
+    for i in range(len(parts)-1):
+        p1, p2 = parts[i], parts[i+1]
+        if p1 not in INDIAN_AREA_CODES:
+            continue
+
+        # Only merge if p1 is a recognized area code and p2 is a long landline segment
+        if len(p2) in [7, 8]:
+            combined = p1 + p2
+            if combined not in known:
+                phones.append(combined)
+                known.add(combined)
+
+        # Handle 044 4689 2301 style
+        if i < len(parts)-2:
+            p3 = parts[i+2]
+            if len(p2) == 4 and len(p3) == 4:
+                combined = p1 + p2 + p3
+                if combined not in known:
+                    phones.append(combined)
+                    known.add(combined)
+
+    return list(OrderedDict.fromkeys(phones))
+
+def extract_websites(full_text):
+    # Normalize spaces in common website markers
+    text = WWW_SPACED_RE.sub("www.", full_text)
+    sites = []
+    for m in WEB_RE.findall(text):
+        candidate = m[0] if isinstance(m, tuple) else m
+        # Basic cleaning
+        candidate = candidate.strip("., ")
+        if candidate:
+            sites.append(candidate.lower())
+    return list(OrderedDict.fromkeys(sites))
+
+def looks_like_name(line):
+    line = line.strip()
+    if not line: return False
+    if NAME_REJECT_RE.search(line):
+        return False
+    if NAME_BAD_KEYWORDS_RE.search(line):
+        return False
+    if line.count(',') + line.count(';') + line.count(':') > 1:
+        return False
+    words = [w for w in NAME_WORD_SPLIT_RE.split(line) if w]
+    if not (1 <= len(words) <= 4):
+        return False
+    for w in words:
+        if len(w) == 1 and w.isalpha():
+            continue
+        if not (w[0].isupper()):
+            return False
+    return True
+
+def extract_name(lines):
+    # The first name-like line wins, so stop there rather than classifying every line
+    if isinstance(lines, TextFeatures):
+        lines = lines.lines
+    for ln in lines:
+        if looks_like_name(ln):
+            return ln.strip()
+    return ""
+
+def extract_job_title(lines):
+    features = as_features(lines)
+    for ln, lw in zip(features.lines, features.lower):
+        if len(lw) < 3 or "@" in lw or WEB_MARKER_RE.search(lw):
+            continue
+        # Look for keywords even without surrounding spaces (handles "Dy.Manager")
+        if JOB_KEYWORDS_RE.search(lw):
+            if not JOB_COMPANY_RE.search(lw):
+                return ln.strip()
+    return ""
+
+def is_all_caps_line(line):
+    words = [w for w in WHITESPACE_RE.split(line) if w.isalpha()]
+    if not words:
+        return False
+    cap_count = sum(1 for w in words if w.isupper())
+    return cap_count >= max(1, len(words) // 1)
+
+def extract_company(lines):
+    features = as_features(lines)
+    lines = features.lines
+    caps = features.caps_flags
+    company_blocks = []
+    i = 0
+    N = len(lines)
+    while i < N:
+        if caps[i]:
+            block = [lines[i].strip()]
+            j = i + 1
+            while j < N and (caps[j] or len(lines[j].split()) <= 3):
+                block.append(lines[j].strip())
+                j += 1
+            company_blocks.append(" ".join(block))
+            i = j
+        else:
+            i += 1
+    if company_blocks:
+        return max(company_blocks, key=lambda s: len(s))
+    for ln in lines:
+        if COMPANY_SUFFIX_RE.search(ln):
+            return ln.strip()
+    return ""
+
+def extract_address(lines):
+    features = as_features(lines)
+    lines, lowers = features.lines, features.lower
+    addr_candidates = []
+    i = 0
+    N = len(lines)
+    while i < N:
+        ln = lowers[i]
+        if ADDRESS_KEYWORDS_RE.search(ln) or PINCODE_RE.search(ln):
+            original_idx = i
+            group = [lines[i].strip()]
+            j = i + 1
+            while j < N:
+                next_ln = lowers[j]
+                # Continue grouping if next line has digits, punctuation, or keywords
+                if ADDRESS_CONTINUATION_RE.search(next_ln) or ADDRESS_CONTINUATION_KEYWORDS_RE.search(next_ln):
+                    if "@" in next_ln or "www" in next_ln: break
+                    group.append(lines[j].strip())
+                    j += 1
+                else: break
+
+            addr_str = ", ".join(group)
+            segments = [s.strip() for s in SEGMENT_SPLIT_RE.split(addr_str)]
+            filtered_segments = []
+            for s in segments:
+                if not s: continue
+                lw = s.lower()
+                if CONTACT_LABELS_RE.search(lw):
+                    continue
+
+                digits_only = NON_DIGIT_RE.sub("", s)
+                has_marker = ADDRESS_MARKERS_RE.search(lw) is not None
+
+                # Keep short segments if they contain markers (like 'Unit A8') or are long enough
+                if not has_marker and len(digits_only) > 0 and len(digits_only) <= 4 and len(s) < 8:
+                    continue
+                if not has_marker and len(digits_only) >= 7 and s.replace(" ", "").replace("-", "").replace("+", "").isdigit():
+                    continue
+                filtered_segments.append(s)
+
+            if filtered_segments:
+                clean_addr = ", ".join(filtered_segments)
+                clean_addr = DOUBLE_COMMA_RE.sub(",", clean_addr).strip()
+                address_to_add = clean_addr.strip(", ")
+                if len(address_to_add) > 5:
+                    # Store with original index to preserve order later
+                    addr_candidates.append({
+                        "index": original_idx,
+                        "text": address_to_add
+                    })
+            i = j
+        else: i += 1
+
+    if not addr_candidates: return []
+
+    # 1. Deduplicate while maintaining order
+    # A candidate whose text also occurs inside any other candidate is dropped. A real
+    # card has a handful of candidates, where the pairwise check is cheapest; past that
+    # the suffix automaton keeps it linear (each candidate contains its own text exactly
+    # once, so "covered" means 2+ occurrences overall).
+    if len(addr_candidates) > SUBSTRING_INDEX_MIN:
+        index = SubstringIndex([c["text"] for c in addr_candidates])
+        unique_candidates = [c for c in addr_candidates if index.count(c["text"]) < 2]
+    else:
+        unique_candidates = [
+            c for c in addr_candidates
+            if not any(c is not o and c["text"] in o["text"] for o in addr_candidates)
+        ]
+
+    # 2. Sort by original visual index (top-to-bottom)
+    unique_candidates.sort(key=lambda x: x["index"])
+
+    # 3. Merge candidates that are nearby (spatial proximity)
+    # If two address blocks start within 5 lines of each other, they are likely the same address
+    if not unique_candidates: return []
+
+    # Parts are collected and joined once per address rather than re-concatenated per merge
+    merged_results = []
+    current = unique_candidates[0]
+    parts = [current["text"]]
+
+    for next_cand in unique_candidates[1:]:
+        # If the gap between lines is small, merge them
+        if next_cand["index"] - (current["index"] + 1) <= 3:
+            parts.append(next_cand["text"])
+        else:
+            merged_results.append(DOUBLE_COMMA_RE.sub(",", ", ".join(parts)))
+            current = next_cand
+            parts = [current["text"]]
+    merged_results.append(DOUBLE_COMMA_RE.sub(",", ", ".join(parts)))
+
+    return [t.strip(", ") for t in merged_results]
+
+# ---------------------------
+# Engine
+# ---------------------------
+def extract_fields(lines):
+    # All OCR-derived card fields, with the per-card line features built once
+    features = as_features(lines)
+    full_text = features.full_text
+    return {
+        "name": extract_name(features),
+        "designation": extract_job_title(features),
+        "company": extract_company(features),
+        "phones": extract_phones(full_text),
+        "emails": extract_emails(full_text),
+        "addresses": extract_address(features),
+        "websites": extract_websites(full_text)
+    }
@@ -0,0 +1,116 @@
+import os
+import re
+import time
+from contextlib import contextmanager
+
+try:
+    from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+except ImportError:
+    Counter = Gauge = Histogram = None
+
+# ---------------------------
+# Configuration
+# ---------------------------
+# Adds a Server-Timing header with the scan's stage breakdown to every response
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0").lower() in ("1", "true", "yes", "on")
+
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CONFIDENCE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 1.0)
+
+# ---------------------------
+# Metrics
+# ---------------------------
+class _NoopMetric:
+    # Stands in for every metric when prometheus_client is not installed
+    def labels(self, *args, **kwargs): return self
+    def observe(self, *args, **kwargs): pass
+    def inc(self, *args, **kwargs): pass
+    def set(self, *args, **kwargs): pass
+    def set_function(self, *args, **kwargs): pass
+
+
+def histogram(name, doc, labels=(), buckets=STAGE_BUCKETS):
+    return Histogram(name, doc, labels, buckets=buckets) if Histogram else _NoopMetric()
+
+def gauge(name, doc, labels=()):
+    return Gauge(name, doc, labels) if Gauge else _NoopMetric()
+
+def counter(name, doc, labels=()):
+    return Counter(name, doc, labels) if Counter else _NoopMetric()
+
+
+scan_stage_seconds = histogram("cardmate_scan_stage_seconds", "Time spent in each scan pipeline stage", ["stage"])
+ocr_confidence = histogram("cardmate_ocr_confidence", "Average OCR confidence per scanned card", buckets=CONFIDENCE_BUCKETS)
+http_request_seconds = histogram("cardmate_http_request_seconds", "HTTP request latency", ["method", "route", "status"])
+ocr_cache_lookups = counter("cardmate_ocr_cache_lookups", "OCR cache lookups by outcome (hit, disk_hit, miss)", ["cache", "result"])
+
+
+def observe_stages(timings, prefix=""):
+    for stage, seconds in timings.items():
+        scan_stage_seconds.labels(prefix + stage).observe(seconds)
+
+
+@contextmanager
+def timed(stage, timings=None):
+    # with timed("db_commit", request.state.timings): ...
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        scan_stage_seconds.labels(stage).observe(seconds)
+        if timings is not None:
+            timings[stage] = seconds
+
+
+def count_cache_lookups(lookups):
+    # lookups: {"result": {"hit": 1, "miss": 0, ...}, "boxes": {...}} as
+    # reported by OCR worker processes, whose own counters nobody scrapes
+    for cache, outcomes in (lookups or {}).items():
+        for outcome, n in outcomes.items():
+            if n:
+                ocr_cache_lookups.labels(cache, outcome).inc(n)
+
+
+def observe_result(result):
+    if result and "ocr_avg_confidence" in result:
+        ocr_confidence.observe(result["ocr_avg_confidence"] or 0.0)
+
+# ---------------------------
+# HTTP wiring
+# ---------------------------
+def server_timing_header(timings):
+    # Server-Timing: recognize;dur=812.4, preprocess_nlmeans;dur=120.0, ...
+    return ", ".join(
+        f"{re.sub(r'[^A-Za-z0-9_-]', '_', stage)};dur={seconds * 1000:.1f}"
+        for stage, seconds in timings.items()
+    )
+
+
+def install_metrics(app, server_timing=SERVER_TIMING):
+    # Adds GET /metrics plus a middleware that times requests and, optionally,
+    # reports request.state.timings as a Server-Timing header
+    from fastapi import Request
+    from fastapi.responses import PlainTextResponse, Response
+
+    @app.middleware("http")
+    async def metrics_middleware(request: Request, call_next):
+        request.state.timings = {}
+        start = time.perf_counter()
+        response = await call_next(request)
+        elapsed = time.perf_counter() - start
+        route = request.scope.get("route")
+        http_request_seconds.labels(
+            request.method, getattr(route, "path", "unmatched"), str(response.status_code)
+        ).observe(elapsed)
+        if server_timing:
+            timings = dict(request.state.timings)
+            timings["total"] = elapsed
+            response.headers["Server-Timing"] = server_timing_header(timings)
+        return response
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        if Histogram is None:
+            return PlainTextResponse("prometheus_client is not installed\n", status_code=503)
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
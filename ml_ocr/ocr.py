@@ -1,309 +1,283 @@
 # bc_ocr_extractor.py (clean + improved structured output)
+import os
 import re
+import time
+import threading
 import cv2
 import numpy as np
-import easyocr
-import matplotlib.pyplot as plt
 from collections import OrderedDict
+from ml_ocr.cache import result_cache, box_cache, image_digest
+from ml_ocr.preprocess import default_pipeline
+from ml_ocr import onnx_backend
+from ml_ocr.extract import (
+    extract_fields, extract_emails, extract_phones, extract_websites, looks_like_name,
+    extract_name, extract_job_title, is_all_caps_line, extract_company, extract_address
+)
 try:
     from pyzbar import pyzbar
 except ImportError:
     pyzbar = None
 
+# Bump whenever preprocessing, OCR settings or parsing change the output,
+# so cached results from an older pipeline are never served
+PIPELINE_VERSION = "3"
+
 # ---------------------------
 # OCR Reader
 # ---------------------------
-reader = easyocr.Reader(["en"], gpu=False)
+# Built on first use so that each worker process owns exactly one Reader.
+# easyocr (and with it torch) is imported here too, so importing this module
+# stays cheap for processes that never run OCR.
+DEFAULT_LANGS = ("en",)
+reader = None
+_readers = {}
+_reader_lock = threading.Lock()
+
+def get_reader(langs=DEFAULT_LANGS):
+    # One Reader per language set; the default English one is also `reader`
+    global reader
+    langs = tuple(langs)
+    if langs not in _readers:
+        with _reader_lock:
+            if langs not in _readers:
+                import easyocr
+                use_onnx = onnx_backend.OCR_BACKEND == "onnx"
+                # EasyOCR's default quantize=True swaps the CPU recognizer's
+                # LSTM/Linear layers for dynamically quantized torch ops, which
+                # torch.onnx.export cannot trace; ONNX exports the fp32 model
+                # (and quantizes it itself when OCR_ONNX_QUANTIZE asks for it)
+                ocr_reader = easyocr.Reader(list(langs), gpu=False, quantize=not use_onnx)
+                if use_onnx:
+                    onnx_backend.install(ocr_reader)
+                _readers[langs] = ocr_reader
+                if langs == DEFAULT_LANGS:
+                    reader = ocr_reader
+    return _readers[langs]
+
+# ---------------------------
+# Card detection & scaling
+# ---------------------------
+# A business card is ~3.5in on its long side; render it at this DPI for OCR
+OCR_CARD_DPI = int(os.getenv("OCR_CARD_DPI", "300"))
+CARD_LONG_INCHES = 3.5
+# Cap for photos where no card outline is found (the card may be a small part of the frame)
+OCR_MAX_SIDE = int(os.getenv("OCR_MAX_SIDE", "2000"))
+# Images within this fraction of each other's height and width are batched
+# together, stretched to a shared canvas (warped cards differ by a few pixels)
+OCR_BATCH_SIZE_TOLERANCE = float(os.getenv("OCR_BATCH_SIZE_TOLERANCE", "0.05"))
+
+def order_quad(pts):
+    # top-left, top-right, bottom-right, bottom-left
+    pts = np.asarray(pts, dtype=np.float32).reshape(4, 2)
+    s = pts.sum(axis=1)
+    d = np.diff(pts, axis=1).ravel()
+    return np.array([pts[np.argmin(s)], pts[np.argmin(d)], pts[np.argmax(s)], pts[np.argmax(d)]], dtype=np.float32)
+
+def find_card_quad(image_bgr, work_side=640, min_area_ratio=0.2):
+    # Edge + contour search on a small copy; returns 4 corners in full-res coordinates or None
+    h, w = image_bgr.shape[:2]
+    scale = min(1.0, work_side / float(max(h, w)))
+    small = cv2.resize(image_bgr, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA) if scale < 1.0 else image_bgr
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    gray = cv2.GaussianBlur(gray, (5, 5), 0)
+    edges = cv2.Canny(gray, 50, 150)
+    edges = cv2.dilate(edges, np.ones((3, 3), np.uint8), iterations=1)
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    min_area = min_area_ratio * small.shape[0] * small.shape[1]
+    for cnt in sorted(contours, key=cv2.contourArea, reverse=True)[:5]:
+        if cv2.contourArea(cnt) < min_area:
+            break
+        approx = cv2.approxPolyDP(cnt, 0.02 * cv2.arcLength(cnt, True), True)
+        if len(approx) == 4 and cv2.isContourConvex(approx):
+            return order_quad(approx / scale)
+    return None
+
+def warp_card(image_bgr, quad):
+    tl, tr, br, bl = quad
+    width = int(max(np.linalg.norm(br - bl), np.linalg.norm(tr - tl)))
+    height = int(max(np.linalg.norm(tr - br), np.linalg.norm(tl - bl)))
+    dst = np.array([[0, 0], [width - 1, 0], [width - 1, height - 1], [0, height - 1]], dtype=np.float32)
+    M = cv2.getPerspectiveTransform(quad, dst)
+    return cv2.warpPerspective(image_bgr, M, (width, height))
+
+def resize_long_side(image, max_side):
+    h, w = image.shape[:2]
+    if max(h, w) <= max_side:
+        return image
+    scale = max_side / float(max(h, w))
+    return cv2.resize(image, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+
+def normalize_card(image_bgr):
+    # Crop to the card and bring it to OCR_CARD_DPI before any heavy filtering
+    quad = find_card_quad(image_bgr)
+    if quad is not None:
+        card = warp_card(image_bgr, quad)
+        return resize_long_side(card, int(CARD_LONG_INCHES * OCR_CARD_DPI))
+    return resize_long_side(image_bgr, OCR_MAX_SIDE)
 
 # ---------------------------
 # Preprocessing
 # ---------------------------
-def preprocess_for_cards(image_bgr):
-    gray = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2GRAY)
-    th = cv2.adaptiveThreshold(
-        gray, 255,
-        cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-        cv2.THRESH_BINARY,
-        blockSize=31,
-        C=12
-    )
-    den = cv2.fastNlMeansDenoising(th, h=20)
-    return den
+def preprocess_for_cards(image_bgr, timings=None, pipeline=None):
+    # Stages come from OCR_PREPROCESS (see ml_ocr/preprocess.py)
+    return (pipeline or default_pipeline).run(image_bgr, timings)
 
 # ---------------------------
 # OCR extraction
 # ---------------------------
-def ocr_lines_from_image(img_path):
-    img = cv2.imread(img_path)
+def load_image(image):
+    # Accepts a file path, raw encoded bytes (e.g. an UploadFile buffer) or a
+    # decoded BGR ndarray; bytes are decoded in memory without touching disk
+    if isinstance(image, np.ndarray):
+        return image
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        img = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            raise ValueError("Could not decode image data")
+        return img
+    img = cv2.imread(image)
     if img is None:
-        raise FileNotFoundError(f"Image not found: {img_path}")
-    proc = preprocess_for_cards(img)
-    results = reader.readtext(proc, detail=1)
+        raise FileNotFoundError(f"Image not found: {image}")
+    return img
+
+def lines_from_results(results):
     results_sorted = sorted(results, key=lambda r: min(pt[1] for pt in r[0]))
     text_lines = [r[1].strip() for r in results_sorted if r[1].strip()]
     confidences = [r[2] for r in results_sorted]
     avg_conf = float(np.mean(confidences)) if confidences else 0.0
+    return text_lines, confidences, avg_conf
+
+def detect_text_boxes(proc, langs=DEFAULT_LANGS):
+    # CRAFT detection only: (horizontal boxes, free-form quads), JSON friendly
+    horizontal, free = get_reader(langs).detect(proc)
+    horizontal = [[int(v) for v in box] for box in horizontal[0]]
+    free = [[[float(x), float(y)] for x, y in box] for box in free[0]]
+    return {"horizontal": horizontal, "free": free}
+
+def recognize_text_boxes(proc, boxes, allowlist=None, langs=DEFAULT_LANGS):
+    # Recognition only, on boxes from detect_text_boxes (possibly cached)
+    return get_reader(langs).recognize(
+        proc,
+        horizontal_list=boxes["horizontal"],
+        free_list=boxes["free"],
+        allowlist=allowlist,
+        detail=1,
+    )
+
+def ocr_lines_from_image(image, boxes=None, box_key=None, allowlist=None, langs=DEFAULT_LANGS):
+    """
+    Detection and recognition run as separate stages. Pass `boxes` (the
+    "boxes" entry of an earlier result) or a `box_key` to look them up in
+    the box cache, and only recognition runs again, e.g. with a different
+    allowlist or language.
+    """
+    timings = {}
+    start = time.perf_counter()
+    img = load_image(image)
+    timings["load"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    img = normalize_card(img)
+    timings["normalize"] = time.perf_counter() - start
+
+    proc = preprocess_for_cards(img, timings)
+
+    if boxes is None and box_key and box_cache.enabled:
+        boxes = box_cache.get(box_key)
+    if boxes is None:
+        start = time.perf_counter()
+        boxes = detect_text_boxes(proc, langs)
+        timings["detect"] = time.perf_counter() - start
+        if box_key and box_cache.enabled:
+            box_cache.put(box_key, boxes)
+
+    start = time.perf_counter()
+    results = recognize_text_boxes(proc, boxes, allowlist, langs)
+    timings["recognize"] = time.perf_counter() - start
+
+    text_lines, confidences, avg_conf = lines_from_results(results)
     return {
         "raw_image": img,
         "proc_image": proc,
+        "boxes": boxes,
         "lines": text_lines,
         "confidences": confidences,
-        "avg_confidence": avg_conf
+        "avg_confidence": avg_conf,
+        "timings": timings
     }
 
-# ---------------------------
-# Extraction functions
-# ---------------------------
-def extract_emails(full_text):
-    # Match with optional spaces around @
-    email_re = r"[A-Za-z0-9._%+\-]+\s*@\s*[A-Za-z0-9.\-]+\.[A-Za-z]{2,}"
-    emails = re.findall(email_re, full_text)
-    if emails:
-        return list(OrderedDict.fromkeys([e.replace(" ", "") for e in emails]))
-    
-    compressed = re.sub(r"\s+", "", full_text)
-    # Catch common OCR mistakes for @ like & or (a) or circles
-    fallback_full = re.findall(
-        r"[A-Za-z0-9._%+\-]+(?:@|\(at\)|\[at\]|\(@|&|\(a\)|©)[A-Za-z0-9.\-]+(?:com|in|net|org|co|biz|info|edu|gov|io|tech|me|app|co\.in)\b",
-        compressed, re.I
-    )
-    fixed = []
-    for c in fallback_full:
-        # Normalize the separator
-        c2 = re.sub(r"(\(at\)|\[at\]|\(@|&|\(a\)|©)", "@", c)
-        # Fix missing dot before TLD
-        c2 = re.sub(r"(com|in|net|org|co|biz|info|edu|gov|io|tech|me|app|co\.in)$", r".\1", c2)
-        # Avoid double dots and handle dots read as commas
-        c2 = c2.replace(",com", ".com").replace(",in", ".in").replace("..", ".")
-        fixed.append(c2.lower())
-    return list(OrderedDict.fromkeys(fixed))
-
-def extract_phones(full_text):
-    phones = []
-    # Match various phone formats but ignore 6-digit numbers that look like pincodes
-    raw = re.findall(r"(?:\+?\d[\d\-\s\(\)]{6,}\d)", full_text)
-    for p in raw:
-        cleaned = re.sub(r"[^\d+]", "", p)
-        digits_only = re.sub(r"[^\d]", "", cleaned)
-        # Avoid common pincodes (6 digits) and very short/long numbers
-        if (len(digits_only) >= 10 and len(digits_only) <= 13) or (len(digits_only) in [7, 8]):
-            if not (len(digits_only) == 6):
-                phones.append(cleaned)
-    # Group landline segments if city code is separate (e.g. 044 - 4689 2301)
-    # Strict Area Code Filter: Only group if it looks like a real Indian area code (044, 080, 022, 011, etc.)
-    indian_area_codes = ["044", "080", "022", "011", "033", "040", "020", "0120", "0124"]
-    parts = re.findall(r"\b\d{2,8}\b", full_text)
-    for i in range(len(parts)-1):
-        p1, p2 = parts[i], parts[i+1]
-        
-        # Only merge if p1 is a recognized area code or if p2 is a long landline segment
-        if (p1 in indian_area_codes or p1 == "044") and len(p2) in [7, 8]:
-            combined = p1 + p2
-            if combined not in [p.replace("+", "").replace(" ", "") for p in phones]:
-                phones.append(combined)
-        
-        # Handle 044 4689 2301 style
-        if i < len(parts)-2:
-            p3 = parts[i+2]
-            if (p1 in indian_area_codes) and len(p2) == 4 and len(p3) == 4:
-                combined = p1 + p2 + p3
-                if combined not in [p.replace("+", "").replace(" ", "") for p in phones]:
-                    phones.append(combined)
-    
-    return list(OrderedDict.fromkeys(phones))
-
-def extract_websites(full_text):
-    # Normalize spaces in common website markers
-    text = re.sub(r"w\s*w\s*w\s*[.,]\s*", "www.", full_text, flags=re.I)
-    web_re = r"(https?://[A-Za-z0-9\-\._~:/\?#\[\]@!$&'()*+,;=%]+|www\.[A-Za-z0-9\-\._]+\.[A-Za-z]{2,}|[A-Za-z0-9\-\._]+\.(com|in|net|org|co|biz|info|io|tech|me|app)\b)"
-    matches = re.findall(web_re, text)
-    sites = []
-    for m in matches:
-        candidate = m[0] if isinstance(m, tuple) else m
-        # Basic cleaning
-        candidate = candidate.strip("., ")
-        if candidate:
-            sites.append(candidate.lower())
-    return list(OrderedDict.fromkeys(sites))
-
-def looks_like_name(line):
-    line = line.strip()
-    if not line: return False
-    if re.search(r"\d|@|www\.|http", line):
-        return False
-    # Exclude address and company keywords
-    bad_keywords = r"\b(nagar|street|road|lane|tower|park|floor|block|sector|ltd|pvt|corp|inc|solutions|services|technologies|architects|associates|st\.|rd\.|logistics|department|dept|office)\b"
-    if re.search(bad_keywords, line, re.I):
-        return False
-    if line.count(',') + line.count(';') + line.count(':') > 1:
-        return False
-    words = [w for w in re.split(r"[\s\.]+", line) if w]
-    if not (1 <= len(words) <= 4):
-        return False
-    for w in words:
-        if len(w) == 1 and w.isalpha():
-            continue
-        if not (w[0].isupper()):
-            return False
-    return True
-
-def extract_name(lines):
-    for i in range(min(4, len(lines))):
-        if looks_like_name(lines[i]):
-            return lines[i].strip()
-    for ln in lines:
-        if looks_like_name(ln):
-            return ln.strip()
-    return ""
-
-def extract_job_title(lines):
-    job_keywords = [
-        "engineer","manager","director","executive","consultant","founder",
-        "ceo","cto","cfo","president","vp","vice","coordinator","lead",
-        "head","officer","architect","developer","designer","specialist",
-        "supervisor","sales","marketing","operations","administrator","proprietor",
-        "partner","owner","principal","representative","development","business",
-        "secretary","assistant"
-    ]
-    for ln in lines:
-        lw = ln.lower()
-        if len(lw) < 3 or "@" in lw or re.search(r"www\.|http", lw):
+def rerecognize(image, allowlist=None, langs=DEFAULT_LANGS):
+    # Re-reads an image seen before (rescan after edit, another angle of the
+    # same photo) reusing its cached boxes, so only recognition runs
+    return ocr_lines_from_image(image, box_key=box_cache_key(image), allowlist=allowlist, langs=langs)
+
+def _batch_group(groups, shape):
+    # Key of an existing group whose images are close enough in size to share a canvas
+    for key in groups:
+        if key[2:] == shape[2:] and all(
+            abs(a - b) <= OCR_BATCH_SIZE_TOLERANCE * b for a, b in zip(shape[:2], key[:2])
+        ):
+            return key
+    return shape
+
+def ocr_lines_from_images(images, batch_size=8):
+    """
+    Batched variant of ocr_lines_from_image. Images of about the same size
+    after normalization (see OCR_BATCH_SIZE_TOLERANCE) go through EasyOCR's
+    readtext_batched together, resized to the largest of them; the rest fall
+    back to readtext. Returns one entry per input, either the usual OCR dict
+    or the exception raised for that image.
+    """
+    out = [None] * len(images)
+    # First member's shape -> members
+    groups = OrderedDict()
+    for i, image in enumerate(images):
+        timings = {}
+        try:
+            start = time.perf_counter()
+            img = load_image(image)
+            timings["load"] = time.perf_counter() - start
+            start = time.perf_counter()
+            img = normalize_card(img)
+            timings["normalize"] = time.perf_counter() - start
+            proc = preprocess_for_cards(img, timings)
+        except Exception as e:
+            out[i] = e
             continue
-        # Improved: Look for keywords even without surrounding spaces (handles "Dy.Manager")
-        if any(k in lw for k in job_keywords):
-            if not re.search(r"\b(pvt|ltd|llp|inc|industries|solutions|corp)\b", lw):
-                return ln.strip()
-    return ""
-
-def is_all_caps_line(line):
-    words = [w for w in re.split(r"\s+", line) if w.isalpha()]
-    if not words:
-        return False
-    cap_count = sum(1 for w in words if w.isupper())
-    return cap_count >= max(1, len(words) // 1)
-
-def extract_company(lines):
-    company_blocks = []
-    i = 0
-    N = len(lines)
-    while i < N:
-        if is_all_caps_line(lines[i]):
-            block = [lines[i].strip()]
-            j = i + 1
-            while j < N and (is_all_caps_line(lines[j]) or len(lines[j].split()) <= 3):
-                block.append(lines[j].strip())
-                j += 1
-            company_blocks.append(" ".join(block))
-            i = j
-        else:
-            i += 1
-    if company_blocks:
-        return max(company_blocks, key=lambda s: len(s))
-    suffix_re = re.compile(
-        r"\b(pvt\.?\s*ltd|private limited|ltd\.?|llp\b|inc\.?|industries|corporation|technologies|solutions|services)\b",
-        re.I
-    )
-    for ln in lines:
-        if suffix_re.search(ln):
-            return ln.strip()
-    return ""
-
-def extract_address(lines):
-    addr_keywords = [
-        "road","street","st.","rd.","nagar","lane","tower","park","sector","phase","building","block",
-        "pincode","pin","near","opp","chennai","bangalore","coimbatore","kolkata","mumbai",
-        "delhi","hyderabad","no.","no","nos","addr","village","industrial","estate"
-    ]
-    addr_candidates = []
-    i = 0
-    N = len(lines)
-    while i < N:
-        ln = lines[i].lower()
-        pin_match = re.search(r"\b\d{6}\b", ln)
-        # Check if line contains any keyword - removed leading space constraint to be more robust
-        has_kw = any(k in ln for k in addr_keywords)
-        
-        if has_kw or pin_match:
-            original_idx = i
-            group = [lines[i].strip()]
-            j = i + 1
-            while j < N:
-                next_ln = lines[j].lower()
-                # Continue grouping if next line has digits, punctuation, or keywords
-                if (re.search(r"\d|,|-", next_ln) or any(k in next_ln for k in ["road","street","nagar","tower","floor","level"])):
-                    if "@" in next_ln or "www" in next_ln: break
-                    group.append(lines[j].strip())
-                    j += 1
-                else: break
-            
-            addr_str = ", ".join(group)
-            segments = [s.strip() for s in re.split(r"[,;]+", addr_str)]
-            filtered_segments = []
-            for s in segments:
-                if not s: continue
-                lw = s.lower()
-                if any(k in lw for k in ["tel:", "fax:", "mob:", "ph:", "phone:", "email:"]):
-                    continue
-                
-                digits_only = re.sub(r"\D", "", s)
-                has_marker = any(k in lw for k in ["no", "level", "unit", "floor", "highway", "tower", "lane", "building", "tower", "anmol"])
-                
-                # Keep short segments if they contain markers (like 'Unit A8') or are long enough
-                if not has_marker and len(digits_only) > 0 and len(digits_only) <= 4 and len(s) < 8:
-                    continue
-                if not has_marker and len(digits_only) >= 7 and s.replace(" ", "").replace("-", "").replace("+", "").isdigit():
-                    continue
-                filtered_segments.append(s)
-            
-            if filtered_segments:
-                clean_addr = ", ".join(filtered_segments)
-                clean_addr = re.sub(r",\s*,", ",", clean_addr).strip()
-                address_to_add = clean_addr.strip(", ")
-                if len(address_to_add) > 5:
-                    # Store with original index to preserve order later
-                    addr_candidates.append({
-                        "index": original_idx,
-                        "text": address_to_add
-                    })
-            i = j
-        else: i += 1
-    
-    if not addr_candidates: return []
-    
-    # 1. Deduplicate while maintaining order
-    # If one candidate is a substring of another, keep the longer one at its earliest occurrence
-    unique_candidates = []
-    for cand in addr_candidates:
-        is_covered = False
-        for other in addr_candidates:
-            if cand != other and cand["text"] in other["text"]:
-                is_covered = True
-                break
-        if not is_covered:
-            unique_candidates.append(cand)
-            
-    # 2. Sort by original visual index (top-to-bottom)
-    unique_candidates.sort(key=lambda x: x["index"])
-    
-    # 3. Merge candidates that are nearby (spatial proximity)
-    # If two address blocks start within 5 lines of each other, they are likely the same address
-    if not unique_candidates: return []
-    
-    merged_results = []
-    current = unique_candidates[0]
-    
-    for next_cand in unique_candidates[1:]:
-        # If the gap between lines is small, merge them
-        if next_cand["index"] - (current["index"] + 1) <= 3:
-            current["text"] = current["text"] + ", " + next_cand["text"]
-            # Re-clean merged text
-            current["text"] = re.sub(r",\s*,", ",", current["text"])
-        else:
-            merged_results.append(current["text"])
-            current = next_cand
-    merged_results.append(current["text"])
-    
-    return [t.strip(", ") for t in merged_results]
+        groups.setdefault(_batch_group(groups, proc.shape), []).append((i, img, proc, timings))
+
+    ocr_reader = get_reader()
+    for members in groups.values():
+        for start in range(0, len(members), batch_size):
+            chunk = members[start:start + batch_size]
+            t0 = time.perf_counter()
+            try:
+                if len(chunk) == 1:
+                    batch_results = [ocr_reader.readtext(chunk[0][2], detail=1)]
+                else:
+                    n_height = max(m[2].shape[0] for m in chunk)
+                    n_width = max(m[2].shape[1] for m in chunk)
+                    batch_results = ocr_reader.readtext_batched(
+                        [m[2] for m in chunk], n_width=n_width, n_height=n_height, detail=1, batch_size=len(chunk)
+                    )
+            except Exception as e:
+                for m in chunk:
+                    out[m[0]] = e
+                continue
+            # Batched inference time is shared evenly between its images
+            per_image = (time.perf_counter() - t0) / len(chunk)
+            for (i, img, proc, timings), results in zip(chunk, batch_results):
+                timings["readtext"] = per_image
+                text_lines, confidences, avg_conf = lines_from_results(results)
+                out[i] = {
+                    "raw_image": img,
+                    "proc_image": proc,
+                    "lines": text_lines,
+                    "confidences": confidences,
+                    "avg_confidence": avg_conf,
+                    "timings": timings
+                }
+    return out
 
 # ---------------------------
 # Structured extraction
@@ -352,55 +326,193 @@ def parse_vcard(vcard_text):
     webs = re.findall(r"\bURL(?:;[^:]*)?:([^\n\r]+)", vcard_text, re.I)
     if webs: data["websites"] = [w.strip() for w in webs]
     
+    # ADR:pobox;ext;street;city;region;code;country
+    adrs = re.findall(r"\bADR(?:;[^:]*)?:([^\n\r]+)", vcard_text, re.I)
+    addresses = [", ".join(p.strip() for p in a.split(";") if p.strip()) for a in adrs]
+    addresses = [a for a in addresses if a]
+    if addresses: data["addresses"] = addresses
+    
     return data
 
-def extract_structured_from_image(img_path, visualize=False):
-    ocr_data = ocr_lines_from_image(img_path)
-    img = ocr_data["raw_image"]
-    lines = ocr_data["lines"]
-    full_text = "\n".join(lines)
+# QR-first fast path: skip EasyOCR when the card's vCard already has a name
+# plus a phone or email
+OCR_QR_FAST_PATH = os.getenv("OCR_QR_FAST_PATH", "1").lower() not in ("0", "false", "no", "off")
+# QR codes decode reliably on a small copy, which keeps this step in the low milliseconds
+OCR_QR_SIDE = int(os.getenv("OCR_QR_SIDE", "1000"))
 
-    # 1. Try QR Code first
-    qr_text = extract_qr_data(img)
-    qr_data = parse_vcard(qr_text) if qr_text else None
+def detect_qr(img, timings=None):
+    start = time.perf_counter()
+    qr_text = extract_qr_data(resize_long_side(img, OCR_QR_SIDE))
+    if timings is not None:
+        timings["qr"] = time.perf_counter() - start
+    return parse_vcard(qr_text) if qr_text else None
 
-    # 2. OCR Extraction
+def retry_qr_on_card(img, card_img):
+    # A small QR in a wide photo may be lost when downscaled; the cropped card keeps it larger
+    if max(img.shape[:2]) <= OCR_QR_SIDE or card_img.shape == img.shape:
+        return None
+    qr_text = extract_qr_data(card_img)
+    return parse_vcard(qr_text) if qr_text else None
+
+def qr_is_complete(qr_data):
+    return bool(qr_data and qr_data.get("name") and (qr_data.get("phones") or qr_data.get("emails")))
+
+def clean_company(company):
+    # Fix "FIRSTLIFT LOGISTICS PVT LTD FIRSTLIFT"
+    parts = company.split()
+    unique_parts = []
+    seen = set()
+    for p in parts:
+        clean_p = re.sub(r'[^\w]', '', p).upper()
+        if clean_p not in seen or len(clean_p) < 4:
+            unique_parts.append(p)
+            seen.add(clean_p)
+    return " ".join(unique_parts)
+
+def structured_from_qr(qr_data):
+    # Result built from the vCard alone; confidence is 1.0 as nothing was guessed
     structured = {
-        "name": extract_name(lines),
-        "designation": extract_job_title(lines),
-        "company": extract_company(lines),
-        "phones": extract_phones(full_text),
-        "emails": extract_emails(full_text),
-        "addresses": extract_address(lines),
-        "websites": extract_websites(full_text),
-        "ocr_avg_confidence": ocr_data["avg_confidence"]
+        "name": "",
+        "designation": "",
+        "company": "",
+        "phones": [],
+        "emails": [],
+        "addresses": [],
+        "websites": [],
+        "ocr_avg_confidence": 1.0
     }
+    for k, v in qr_data.items():
+        if v: structured[k] = v
+    if structured["company"]:
+        structured["company"] = clean_company(structured["company"])
+    return structured
 
-    # 3. Merge QR data if found (QR is more accurate)
+def structured_from_ocr(ocr_data, qr_data=None):
+    # 1. OCR Extraction
+    structured = extract_fields(ocr_data["lines"])
+    structured["ocr_avg_confidence"] = ocr_data["avg_confidence"]
+
+    # 2. Merge QR data if found (QR is more accurate)
     if qr_data:
         for k, v in qr_data.items():
             if v: structured[k] = v
 
-    # 4. Clean up Company (Fix "FIRSTLIFT LOGISTICS PVT LTD FIRSTLIFT")
+    # 3. Clean up Company
     if structured["company"]:
-        parts = structured["company"].split()
-        unique_parts = []
-        seen = set()
-        for p in parts:
-            clean_p = re.sub(r'[^\w]', '', p).upper()
-            if clean_p not in seen or len(clean_p) < 4:
-                unique_parts.append(p)
-                seen.add(clean_p)
-        structured["company"] = " ".join(unique_parts)
+        structured["company"] = clean_company(structured["company"])
 
     return structured
 
+def extract_structured(img, timings=None, box_key=None):
+    # img: decoded BGR image. QR runs first and may make OCR unnecessary.
+    # box_key: cache key under which the detected text boxes are kept
+    qr_data = detect_qr(img, timings)
+    if OCR_QR_FAST_PATH and qr_is_complete(qr_data):
+        return structured_from_qr(qr_data)
+
+    ocr_data = ocr_lines_from_image(img, box_key=box_key)
+    if timings is not None:
+        timings.update(ocr_data["timings"])
+    if qr_data is None:
+        start = time.perf_counter()
+        qr_data = retry_qr_on_card(img, ocr_data["raw_image"])
+        if timings is not None:
+            timings["qr"] = timings.get("qr", 0.0) + time.perf_counter() - start
+
+    start = time.perf_counter()
+    structured = structured_from_ocr(ocr_data, qr_data)
+    if timings is not None:
+        timings["parse"] = time.perf_counter() - start
+    return structured
+
+def cache_key(image, digest=None):
+    # Every setting that changes the result is part of the key, so a disk
+    # tier shared across restarts never serves output of an old configuration
+    settings = f"{OCR_CARD_DPI}-{OCR_MAX_SIDE}-qr{int(OCR_QR_FAST_PATH)}-{OCR_QR_SIDE}"
+    return f"{PIPELINE_VERSION}-{onnx_backend.backend_name()}-{settings}-{default_pipeline.spec}-{digest or image_digest(image)}"
+
+def box_cache_key(image, digest=None):
+    # Boxes depend on the image, how it is normalized and preprocessed and the
+    # detector, but not on parsing, so they outlive PIPELINE_VERSION bumps
+    return f"{onnx_backend.backend_name()}-{OCR_CARD_DPI}-{OCR_MAX_SIDE}-{default_pipeline.spec}-{digest or image_digest(image)}"
+
+def extract_structured_from_image(image, visualize=False, use_cache=True, timings=None):
+    # image: file path, encoded image bytes or a BGR ndarray
+    # timings, if given, receives stage -> seconds (only "cache" on a cache hit)
+    start = time.perf_counter()
+    digest = image_digest(image) if use_cache and (result_cache.enabled or box_cache.enabled) else None
+    key = cache_key(image, digest) if digest and result_cache.enabled else None
+    if key:
+        cached = result_cache.get(key)
+        if timings is not None:
+            timings["cache"] = time.perf_counter() - start
+        if cached is not None:
+            return cached
+    start = time.perf_counter()
+    img = load_image(image)
+    load_time = time.perf_counter() - start
+    structured = extract_structured(img, timings, box_key=box_cache_key(image, digest) if digest else None)
+    if timings is not None:
+        # The pipeline's own "load" is a no-op on the already decoded array
+        timings["load"] = load_time
+    if key:
+        result_cache.put(key, structured)
+    return structured
+
+def extract_structured_from_images(images, use_cache=True):
+    # One result per image: the structured dict, or the exception for that image
+    results = [None] * len(images)
+    keys = [None] * len(images)
+    pending = []
+    qr_found = {}
+    for i, image in enumerate(images):
+        try:
+            if use_cache and result_cache.enabled:
+                keys[i] = cache_key(image)
+                cached = result_cache.get(keys[i])
+                if cached is not None:
+                    results[i] = cached
+                    continue
+            img = load_image(image)
+            qr_data = detect_qr(img)
+        except Exception as e:
+            results[i] = e
+            continue
+        if OCR_QR_FAST_PATH and qr_is_complete(qr_data):
+            results[i] = structured_from_qr(qr_data)
+            if keys[i]:
+                result_cache.put(keys[i], results[i])
+            continue
+        qr_found[i] = qr_data
+        pending.append((i, img))
+
+    ocr_batch = ocr_lines_from_images([img for _, img in pending])
+    for (i, img), ocr_data in zip(pending, ocr_batch):
+        if isinstance(ocr_data, Exception):
+            results[i] = ocr_data
+            continue
+        try:
+            qr_data = qr_found[i]
+            if qr_data is None:
+                qr_data = retry_qr_on_card(img, ocr_data["raw_image"])
+            results[i] = structured_from_ocr(ocr_data, qr_data)
+        except Exception as e:
+            results[i] = e
+            continue
+        if keys[i]:
+            result_cache.put(keys[i], results[i])
+    return results
+
 # ---------------------------
 # CLI Run
 # ---------------------------
 if __name__ == "__main__":
-    image_path = r"C:\Users\mohanraj\OneDrive\Desktop\finalyr project\WhatsApp Image 2025-08-27 at 19.41.36_28e3dd69.jpg"
-    visualize = True
-    result = extract_structured_from_image(image_path, visualize=visualize)
+    # python -m ml_ocr.ocr path/to/card.jpg   (see ml_ocr/benchmark.py for a whole folder)
+    import sys
     from pprint import pprint
+    if len(sys.argv) < 2:
+        sys.exit("usage: python -m ml_ocr.ocr <image>")
+    timings = {}
+    result = extract_structured(load_image(sys.argv[1]), timings)
     pprint(result)
+    pprint({k: f"{v * 1000:.1f} ms" for k, v in timings.items()})
@@ -0,0 +1,156 @@
+# ONNX Runtime inference for EasyOCR's detector (CRAFT) and recognizer (CRNN).
+#
+#   OCR_BACKEND=onnx OCR_ONNX_QUANTIZE=recognizer python -m ml_ocr.ocr card.jpg
+#
+# The first use exports both networks from the loaded Reader to OCR_ONNX_DIR
+# (optionally followed by dynamic INT8 quantization); later starts load the
+# .onnx files directly. The ONNX sessions are swapped in for reader.detector
+# and reader.recognizer, so readtext() and everything downstream of it
+# (lines, confidences, avg_confidence) work unchanged.
+#
+# Needs `pip install onnxruntime` (and torch, already required by easyocr,
+# for the one-off export).
+import os
+
+# ---------------------------
+# Configuration
+# ---------------------------
+# "torch" (EasyOCR as shipped) or "onnx"
+OCR_BACKEND = os.getenv("OCR_BACKEND", "torch").lower()
+# Dynamic INT8 quantization: "" (none), "recognizer" (the LSTM/linear heavy
+# CRNN, small accuracy cost) or "all" (also the convolutional CRAFT detector)
+OCR_ONNX_QUANTIZE = os.getenv("OCR_ONNX_QUANTIZE", "").lower()
+OCR_ONNX_DIR = os.getenv("OCR_ONNX_DIR", os.path.join(os.path.expanduser("~"), ".EasyOCR", "onnx"))
+ONNX_OPSET = 13
+
+
+def backend_name():
+    # Part of the OCR cache key: different backends may read a card differently
+    if OCR_BACKEND != "onnx":
+        return OCR_BACKEND
+    return f"onnx-int8-{OCR_ONNX_QUANTIZE}" if OCR_ONNX_QUANTIZE else "onnx"
+
+# ---------------------------
+# Export & quantization
+# ---------------------------
+def _unwrap(model):
+    # EasyOCR wraps its networks in DataParallel on some setups
+    return getattr(model, "module", model)
+
+
+def export_detector(reader, path):
+    import torch
+    net = _unwrap(reader.detector).eval()
+    dummy = torch.randn(1, 3, 640, 640)
+    torch.onnx.export(
+        net, dummy, path,
+        input_names=["image"], output_names=["y", "feature"],
+        dynamic_axes={
+            "image": {0: "batch", 2: "height", 3: "width"},
+            "y": {0: "batch", 1: "out_height", 2: "out_width"},
+            "feature": {0: "batch", 2: "out_height", 3: "out_width"},
+        },
+        opset_version=ONNX_OPSET,
+    )
+
+
+def export_recognizer(reader, path):
+    import torch
+    net = _unwrap(reader.recognizer).eval()
+    # Greyscale line crops at the recognizer's fixed height, any width
+    image = torch.randn(2, 1, reader.imgH, 256)
+    text = torch.zeros(2, 26, dtype=torch.long)
+    torch.onnx.export(
+        net, (image, text), path,
+        input_names=["image", "text"], output_names=["preds"],
+        dynamic_axes={
+            "image": {0: "batch", 3: "width"},
+            "text": {0: "batch"},
+            "preds": {0: "batch", 1: "steps"},
+        },
+        opset_version=ONNX_OPSET,
+    )
+
+
+def quantize(src, dst):
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    quantize_dynamic(src, dst, weight_type=QuantType.QInt8)
+
+
+def model_paths(reader):
+    # Keyed by the recognition model so e.g. english_g2 and latin_g2 never collide
+    rec = getattr(reader, "model_lang", None) or "rec"
+    q = OCR_ONNX_QUANTIZE
+    det = os.path.join(OCR_ONNX_DIR, f"craft{'-int8' if q == 'all' else ''}.onnx")
+    rec = os.path.join(OCR_ONNX_DIR, f"recognizer-{rec}{'-int8' if q in ('recognizer', 'all') else ''}.onnx")
+    return det, rec
+
+
+def _build(path, make):
+    # Writes to a per-process temp file first: several OCR workers may start
+    # at once and must never load a half-written model
+    if not os.path.exists(path):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        make(tmp)
+        os.replace(tmp, path)
+    return path
+
+
+def ensure_models(reader):
+    # Exports (and quantizes) whatever is missing; returns (detector, recognizer) paths
+    os.makedirs(OCR_ONNX_DIR, exist_ok=True)
+    paths = []
+    for path, export in zip(model_paths(reader), (export_detector, export_recognizer)):
+        if path.endswith("-int8.onnx"):
+            fp32 = _build(path[:-len("-int8.onnx")] + ".onnx", lambda out: export(reader, out))
+            _build(path, lambda out: quantize(fp32, out))
+        else:
+            _build(path, lambda out: export(reader, out))
+        paths.append(path)
+    return paths
+
+# ---------------------------
+# Runtime
+# ---------------------------
+class OnnxModule:
+    """
+    Calls an ONNX Runtime session the way EasyOCR calls its torch modules:
+    torch tensors in, torch tensors out. Inputs the exported graph dropped
+    (the CTC recognizer ignores `text`) are skipped.
+    """
+
+    def __init__(self, path, input_names, threads=0):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = input_names
+        self._used = {i.name for i in self.session.get_inputs()}
+
+    def eval(self):
+        return self
+
+    def to(self, *args, **kwargs):
+        return self
+
+    def __call__(self, *inputs):
+        import torch
+        feeds = {
+            name: tensor.detach().cpu().numpy()
+            for name, tensor in zip(self.input_names, inputs) if name in self._used
+        }
+        outputs = [torch.from_numpy(o) for o in self.session.run(None, feeds)]
+        return outputs[0] if len(outputs) == 1 else tuple(outputs)
+
+
+def install(reader):
+    # Swaps the reader's torch networks for ONNX Runtime sessions, in place
+    import torch
+    det_path, rec_path = ensure_models(reader)
+    threads = torch.get_num_threads()
+    reader.detector = OnnxModule(det_path, ["image"], threads)
+    reader.recognizer = OnnxModule(rec_path, ["image", "text"], threads)
+    return reader
@@ -0,0 +1,98 @@
+import os
+import time
+
+import cv2
+import numpy as np
+
+# ---------------------------
+# Configuration
+# ---------------------------
+# Comma separated stage list, each optionally "name:arg" (e.g. "gray,adaptive_threshold,median:3").
+# The default reproduces the original grayscale -> threshold -> NL-means chain.
+DEFAULT_PREPROCESS = "gray,adaptive_threshold,nlmeans"
+OCR_PREPROCESS = os.getenv("OCR_PREPROCESS", DEFAULT_PREPROCESS)
+
+# ---------------------------
+# Stages
+# ---------------------------
+def gray(img, arg=None):
+    if img.ndim == 3:
+        return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    return img
+
+def adaptive_threshold(img, arg=None):
+    return cv2.adaptiveThreshold(
+        gray(img), 255,
+        cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+        cv2.THRESH_BINARY,
+        blockSize=int(arg or 31),
+        C=12
+    )
+
+def nlmeans(img, arg=None):
+    # Best quality, by far the slowest stage
+    return cv2.fastNlMeansDenoising(img, h=int(arg or 20))
+
+def median(img, arg=None):
+    return cv2.medianBlur(img, int(arg or 3))
+
+def bilateral(img, arg=None):
+    return cv2.bilateralFilter(img, int(arg or 5), 50, 50)
+
+def morph_open(img, arg=None):
+    # Opening on the inverted image removes isolated dark specks on a binary card
+    k = int(arg or 2)
+    kernel = np.ones((k, k), np.uint8)
+    return cv2.bitwise_not(cv2.morphologyEx(cv2.bitwise_not(img), cv2.MORPH_OPEN, kernel))
+
+def speckle_ratio(img):
+    # Share of pixels a 3x3 median would flip, a cheap noise estimate
+    return float(np.count_nonzero(cv2.absdiff(img, cv2.medianBlur(img, 3)) > 64)) / img.size
+
+def auto_denoise(img, arg=None):
+    # NL-means only when the image is noticeably speckled, median otherwise
+    threshold = float(arg or 0.02)
+    if speckle_ratio(img) > threshold:
+        return nlmeans(img)
+    return median(img)
+
+STAGES = {
+    "gray": gray,
+    "adaptive_threshold": adaptive_threshold,
+    "nlmeans": nlmeans,
+    "median": median,
+    "bilateral": bilateral,
+    "open": morph_open,
+    "auto_denoise": auto_denoise,
+}
+
+# ---------------------------
+# Pipeline
+# ---------------------------
+class PreprocessPipeline:
+    """An ordered list of named stages, e.g. PreprocessPipeline("gray,adaptive_threshold,median")."""
+
+    def __init__(self, spec=OCR_PREPROCESS):
+        self.stages = []
+        for item in (spec or "").split(","):
+            item = item.strip()
+            if not item:
+                continue
+            name, _, arg = item.partition(":")
+            if name not in STAGES:
+                raise ValueError(f"Unknown preprocessing stage '{name}' (available: {', '.join(STAGES)})")
+            self.stages.append((name, arg or None))
+        self.spec = ",".join(f"{n}:{a}" if a else n for n, a in self.stages)
+
+    def run(self, img, timings=None):
+        # timings, if given, receives "preprocess.<stage>" -> seconds
+        for name, arg in self.stages:
+            start = time.perf_counter()
+            img = STAGES[name](img, arg)
+            if timings is not None:
+                key = f"preprocess.{name}"
+                timings[key] = timings.get(key, 0.0) + time.perf_counter() - start
+        return img
+
+
+default_pipeline = PreprocessPipeline()
@@ -1,13 +1,36 @@
-from fastapi import FastAPI, File, UploadFile
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import List
+
+from fastapi import FastAPI, File, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 import uvicorn
-import os
-import uuid
 
 # Import your OCR function
-from ml_ocr.ocr import extract_structured_from_image
+from ml_ocr import ocr
+from ml_ocr.ocr import extract_structured_from_image, extract_structured_from_images
+from ml_ocr.cache import result_cache
+from ml_ocr.metrics import install_metrics, observe_stages, observe_result
+
+warm_error = None
+
+def _warm_up():
+    global warm_error
+    try:
+        ocr.get_reader()
+    except Exception as e:
+        warm_error = str(e)
+        print(f"OCR warm-up failed: {e}")
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the model in the background; /health turns 200 once it is ready
+    threading.Thread(target=_warm_up, name="ocr-warmup", daemon=True).start()
+    yield
+
+app = FastAPI(lifespan=lifespan)
 
 # Enable CORS for all origins (adjust for production)
 app.add_middleware(
@@ -17,31 +40,56 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Prometheus /metrics, request latency and the optional Server-Timing header
+install_metrics(app)
+
 @app.get("/")
 def home():
     return {"message": "OCR API Running"}
 
+@app.get("/health")
+def health():
+    # Used by the backend's OCR client to pick nodes: only "ready" nodes get traffic
+    if warm_error:
+        return JSONResponse(status_code=503, content={"status": "error", "detail": warm_error})
+    if ocr.reader is None:
+        return JSONResponse(status_code=503, content={"status": "warming"})
+    return {"status": "ready"}
+
+@app.get("/cache/stats")
+def cache_stats():
+    return result_cache.stats()
+
 @app.post("/ocr")
-async def ocr_api(file: UploadFile = File(...)):
-    # Generate a unique temp filename to avoid conflicts
-    temp_path = f"temp_upload_{uuid.uuid4().hex}.jpg"
+async def ocr_api(request: Request, file: UploadFile = File(...)):
     try:
-        # Save uploaded file
-        with open(temp_path, "wb") as f:
-            f.write(await file.read())
+        # Decode the upload straight from memory; nothing is written to disk
+        contents = await file.read()
 
-        # Extract structured data
-        result = extract_structured_from_image(temp_path)
+        # Extract structured data off the event loop so /health stays responsive
+        timings = request.state.timings
+        result = await asyncio.to_thread(extract_structured_from_image, contents, timings=timings)
+        observe_stages(timings, "ocr.")
+        observe_result(result)
 
-        return {"data": result}
+        return {"data": result, "timings": timings}
 
     except Exception as e:
         return {"error": f"OCR processing failed: {str(e)}"}
 
-    finally:
-        # Remove temp file if it exists
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+@app.post("/ocr/batch")
+async def ocr_batch_api(files: List[UploadFile] = File(...)):
+    # One entry per file, in order: {"data": ...} or {"error": ...}
+    contents = [await f.read() for f in files]
+    results = await asyncio.to_thread(extract_structured_from_images, contents)
+    out = []
+    for r in results:
+        if isinstance(r, Exception):
+            out.append({"error": str(r)})
+        else:
+            observe_result(r)
+            out.append({"data": r})
+    return {"results": out}
 
 if __name__ == "__main__":
     uvicorn.run("ml_ocr.server:app", host="0.0.0.0", port=5000, reload=True)
@@ -0,0 +1,187 @@
+import os
+import sys
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+# ---------------------------
+# Configuration
+# ---------------------------
+OCR_PROCESS_WORKERS = int(os.getenv("OCR_PROCESS_WORKERS", str(max(1, (os.cpu_count() or 1) // 2))))
+# Intra-op threads each worker's torch may use. Defaults to an even split of
+# the cores so N workers never run more than cpu_count threads in total.
+OCR_TORCH_THREADS = int(os.getenv("OCR_TORCH_THREADS", "0"))
+# Hand uploads to worker processes through shared memory instead of pickling them
+OCR_SHARED_MEMORY = os.getenv("OCR_SHARED_MEMORY", "1").lower() in ("1", "true", "yes", "on")
+
+
+def default_torch_threads(workers):
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+# ---------------------------
+# Worker side
+# ---------------------------
+def _init_worker(torch_threads):
+    # Pin thread counts before any model is built, then load the Reader once
+    import torch
+    torch.set_num_threads(torch_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+    import cv2
+    cv2.setNumThreads(1)
+
+    from ml_ocr import ocr
+    ocr.get_reader()
+
+
+def warm_reader():
+    # Loads the Reader in the calling process (thread engine warm-up)
+    from ml_ocr import ocr
+    ocr.get_reader()
+    return os.getpid()
+
+
+def _ping():
+    return os.getpid()
+
+
+def run_counted(call):
+    # Runs call() in a worker process and returns (result, cache lookups it
+    # made): the API process adds them to its own /metrics counters
+    from ml_ocr.cache import cache_counts
+    before = cache_counts()
+    result = call()
+    after = cache_counts()
+    lookups = {
+        name: {outcome: n - before[name][outcome] for outcome, n in counts.items()}
+        for name, counts in after.items()
+    }
+    return result, lookups
+
+
+def run_ocr_job(contents):
+    # contents: the raw uploaded bytes, decoded in memory by the OCR pipeline.
+    # Stage timings travel back with the result so the API process can export them.
+    from ml_ocr.ocr import extract_structured_from_image
+    timings = {}
+    data = extract_structured_from_image(contents, timings=timings)
+    return {"data": data, "timings": timings}
+
+
+def run_ocr_batch_job(items):
+    # items: list of raw image bytes; returns one result or error string per item
+    from ml_ocr.ocr import extract_structured_from_images
+    results = extract_structured_from_images(items)
+    # Exceptions are flattened to strings so they pickle cleanly across processes
+    return [{"error": str(r)} if isinstance(r, Exception) else {"data": r} for r in results]
+
+
+def run_shared_ocr_job(descriptor):
+    # Same as run_ocr_job, reading the image straight out of a SharedImages block
+    with attach_shared(descriptor) as (views,):
+        return run_ocr_job(views)
+
+
+def run_shared_ocr_batch_job(descriptor):
+    with attach_shared(descriptor) as views:
+        return run_ocr_batch_job(views)
+
+# ---------------------------
+# Shared-memory hand-off
+# ---------------------------
+class SharedImages:
+    """
+    Encoded images packed back to back into one shared memory block. Only
+    the small descriptor (block name, [(offset, size), ...]) is pickled to
+    the worker, which decodes from the mapping without copying it. The
+    creating process owns the block and must release() it once the job is done.
+    """
+
+    def __init__(self, items):
+        sizes = [len(c) for c in items]
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, sum(sizes)))
+        spans = []
+        offset = 0
+        for contents, size in zip(items, sizes):
+            self._shm.buf[offset:offset + size] = contents
+            spans.append((offset, size))
+            offset += size
+        self.descriptor = (self._shm.name, spans)
+
+    def release(self, _future=None):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+
+def _attach(name):
+    # Pool workers share the parent's resource tracker, so attaching never
+    # makes a worker responsible for unlinking the block
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+@contextmanager
+def attach_shared(descriptor):
+    # Yields one memoryview per image; they are invalid after the with block
+    name, spans = descriptor
+    shm = _attach(name)
+    views = [shm.buf[offset:offset + size] for offset, size in spans]
+    try:
+        yield views
+    finally:
+        try:
+            for view in views:
+                view.release()
+            shm.close()
+        except BufferError:
+            # Something still references the mapping; it is unmapped by the GC
+            pass
+
+# ---------------------------
+# Pool
+# ---------------------------
+class OCRProcessPool:
+    """
+    A pool of OCR worker processes. Every worker pins its torch thread count
+    and builds its own EasyOCR Reader at start-up, then receives jobs over
+    the executor's IPC channel (image payloads via SharedImages when
+    OCR_SHARED_MEMORY is on).
+    """
+
+    def __init__(self, workers=OCR_PROCESS_WORKERS, torch_threads=OCR_TORCH_THREADS):
+        self.workers = max(1, workers)
+        self.torch_threads = torch_threads or default_torch_threads(self.workers)
+        self._executor = None
+
+    def start(self, warm=True):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.torch_threads,),
+            )
+            if warm:
+                self.warm_up()
+        return self._executor
+
+    def warm_up(self):
+        # One ping per worker forces every process (and its Reader) to exist.
+        # result() re-raises a failed worker initializer (BrokenProcessPool),
+        # so a pool that cannot scan is never reported as ready.
+        for future in [self._executor.submit(_ping) for _ in range(self.workers)]:
+            future.result()
+
+    def submit(self, fn, *args, **kwargs):
+        return self.start(warm=False).submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+            self._executor = None